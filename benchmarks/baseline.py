@@ -0,0 +1,40 @@
+#Shared helpers to save benchmark results as baselines and compare against them.
+import json
+import os
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+# Relative slowdown that is reported as a regression
+REGRESSION_THRESHOLD = 0.20
+
+#Function to build the path of a named baseline file.
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+def load_baseline(name):
+    path = baseline_path(name)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def save_baseline(name, results):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    with open(baseline_path(name), "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"📘 Baseline saved → {baseline_path(name)}")
+
+#Function to compare {case: {metric: value}} results where lower is better.
+def compare(results, baseline, metrics, threshold=REGRESSION_THRESHOLD):
+    """Print every metric change against the baseline and return the regressions."""
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case, {})
+        for metric in metrics:
+            if current.get(metric) is not None and previous.get(metric):
+                change = (current[metric] - previous[metric]) / previous[metric]
+                flag = "⚠️ REGRESSION" if change > threshold else ""
+                print(f"{case:45s} {metric:15s} {previous[metric]:.3f} → {current[metric]:.3f} "
+                      f"({change:+.0%}) {flag}")
+                if flag:
+                    regressions.append((case, metric))
+    return regressions
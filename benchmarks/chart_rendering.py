@@ -0,0 +1,88 @@
+#Benchmark for the chart rendering stage (lambda_ingest/lambda_render_charts.py).
+#Publishes synthetic aggregated and forecast outputs to an in-process moto S3 bucket
+#(pip install moto), then times a full render in-process and with a process pool, a
+#rerun with unchanged data (nothing to draw) and a rerun after --changed of the series
+#got new data. Reports charts per second and the time for --target charts at that rate.
+#Usage: python benchmarks/chart_rendering.py [--countries 250] [--workers 4] [--save] [--compare]
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import pandas as pd
+from baseline import load_baseline, save_baseline, compare
+from query_latency import make_outputs, BUCKET
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lambda_ingest"))
+# Lambda's time budget, for the projection of --target charts
+BUDGET_S = 900
+
+#Function to publish the outputs and the code → name mapping the charts join on.
+def publish_outputs(forecast_df, anomaly_df, version):
+    from dataset_catalog import publish
+    from s3_access import put_text
+    codes = forecast_df["country"].drop_duplicates()
+    put_text(BUCKET, "country_codes/country_codes.csv",
+             pd.DataFrame({"country": "Country " + codes, "code_3": codes, "continent": "Europe"}).to_csv(index=False))
+    publish(BUCKET, "forecasted_data", forecast_df, version, "processed/forecast/")
+    publish(BUCKET, "grouped_combined_data", anomaly_df, version, "aggregated/forecasting/")
+
+#Function to run the stage once and time it.
+def timed_run(charts, **kwargs):
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        summary = charts.render_charts(**kwargs)
+        seconds = time.perf_counter() - started
+    return {"seconds": seconds, "rendered": summary["rendered"], "total": summary["total"],
+            "charts_per_s": summary["rendered"] / seconds}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--countries", type=int, default=250, help="countries (4 diseases each)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--changed", type=float, default=0.1, help="share of series changed for the rerun")
+    parser.add_argument("--target", type=int, default=5000, help="chart count projected against the time budget")
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    args = parser.parse_args()
+
+    from moto import mock_aws
+    with mock_aws():
+        from s3_access import get_client
+        import lambda_render_charts as charts
+        get_client().create_bucket(Bucket=BUCKET)
+        forecast_df, anomaly_df = make_outputs(args.countries)
+        with contextlib.redirect_stdout(io.StringIO()):
+            publish_outputs(forecast_df, anomaly_df, "20250101")
+
+        results = {}
+        results["full, in-process"] = timed_run(charts, force=True, workers=1)
+        results[f"full, {args.workers} workers"] = timed_run(charts, force=True, workers=args.workers)
+        results["rerun, unchanged"] = timed_run(charts, workers=args.workers)
+        # New data for a share of the countries: only their charts are redrawn
+        changed = anomaly_df["country_name"].drop_duplicates().sample(frac=args.changed, random_state=0)
+        anomaly_df.loc[anomaly_df["country_name"].isin(changed), "value"] += 1
+        with contextlib.redirect_stdout(io.StringIO()):
+            publish_outputs(forecast_df, anomaly_df, "20250102")
+        results[f"rerun, {args.changed:.0%} changed"] = timed_run(charts, workers=args.workers)
+        index_size = len(get_client().get_object(Bucket=BUCKET, Key=charts.INDEX_KEY)["Body"].read())
+
+    for case, values in results.items():
+        print(f"{case:22s} {values['rendered']:6d}/{values['total']:6d} charts {values['seconds']:8.2f}s  "
+              f"{values['charts_per_s']:8.1f} charts/s")
+    rate = results[f"full, {args.workers} workers"]["charts_per_s"]
+    print(f"Index: {index_size / 1024:.0f} KB; {args.target} charts at {rate:.0f} charts/s ≈ "
+          f"{args.target / rate:.0f}s of the {BUDGET_S}s budget")
+
+    regressions = []
+    baseline = load_baseline("chart_rendering") if args.compare else None
+    if baseline:
+        regressions = compare(results, baseline, ["seconds"])
+    if args.save:
+        save_baseline("chart_rendering", results)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#Benchmark for the memory of the cleaning stage: in-memory vs chunked mode.
+#Uploads synthetic raw files (synthetic_data.py) at a base scale and at growing
+#multiples of it to a local moto S3 server (pip install "moto[server]"), then cleans
+#one category in a fresh process per run so peak RSS is not shared between runs.
+#Reports the RSS growth over the post-import baseline (Linux only); in chunked mode
+#it should stay flat as the input grows, bounded by --memory-mb.
+#Usage: python benchmarks/clean_memory.py [--base 100x4x25] [--factors 1,10,20] [--memory-mb 16] [--save] [--compare]
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import boto3
+from baseline import load_baseline, save_baseline, compare
+from synthetic_data import generate_category
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT, "lambda_ingest")
+BUCKET = "vacc-disease-mlops-pipeline-argh"
+CATEGORY = "disease"
+PORT = 5126
+
+# Import peaks are higher than the stage's working set, so the child resets the
+# RSS high-water mark (Linux /proc/self/clear_refs) after its imports
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {lambda_dir!r})
+import lambda_clean_handler as clean
+clean.s3.list_buckets()
+def status_mb(field):
+    with open("/proc/self/status") as f:
+        line = next(line for line in f if line.startswith(field + ":"))
+    return int(line.split()[1]) / 1024
+with open("/proc/self/clear_refs", "w") as f:
+    f.write("5")
+baseline = status_mb("VmRSS")
+t0 = time.perf_counter()
+clean.process_category({category!r}, chunked={chunked!r}, memory_mb={memory_mb!r})
+print(json.dumps({{"rss_growth_mb": status_mb("VmHWM") - baseline, "seconds": time.perf_counter() - t0}}))
+"""
+
+#Function to replace the raw files of the category with a new scale.
+def upload_raw(s3, countries, indicators, years):
+    for key in [obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET).get("Contents", [])]:
+        s3.delete_object(Bucket=BUCKET, Key=key)
+    total = size = 0
+    for name, df in generate_category(CATEGORY, countries, indicators, years).items():
+        body = df.to_csv(index=False).encode()
+        s3.put_object(Bucket=BUCKET, Key=f"raw/{CATEGORY}/{name}_20000101.csv", Body=body)
+        total += len(df)
+        size += len(body)
+    return total, size
+
+#Function to clean the category once in a fresh process.
+def run_child(chunked, memory_mb, env):
+    code = CHILD.format(lambda_dir=LAMBDA_DIR, category=CATEGORY, chunked=chunked, memory_mb=memory_mb)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, cwd=ROOT)
+    lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+    if out.returncode != 0 or not lines:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr else "no output")
+    return json.loads(lines[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--base", default="100x4x25", help="countriesxindicatorsxyears of the 1x input")
+    parser.add_argument("--factors", default="1,10,20", help="multiples of the base country count")
+    parser.add_argument("--memory-mb", type=int, default=16, help="memory ceiling of the chunked mode")
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    args = parser.parse_args()
+
+    from moto.server import ThreadedMotoServer
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=PORT, verbose=False)
+    server.start()
+    env = dict(os.environ, AWS_ENDPOINT_URL_S3=f"http://127.0.0.1:{PORT}", AWS_DEFAULT_REGION="us-east-1",
+               AWS_ACCESS_KEY_ID="testing", AWS_SECRET_ACCESS_KEY="testing")
+    s3 = boto3.client("s3", endpoint_url=env["AWS_ENDPOINT_URL_S3"], region_name="us-east-1",
+                      aws_access_key_id="testing", aws_secret_access_key="testing")
+    s3.create_bucket(Bucket=BUCKET)
+    countries, indicators, years = (int(part) for part in args.base.split("x"))
+    results = {}
+    try:
+        for factor in [int(f) for f in args.factors.split(",")]:
+            rows, size = upload_raw(s3, countries * factor, indicators, years)
+            for mode, chunked in (("in-memory", False), ("chunked", True)):
+                # Start every run from the same state: no master file yet
+                s3.delete_object(Bucket=BUCKET, Key=f"aggregated/{CATEGORY}/master_{CATEGORY}.csv")
+                result = run_child(chunked, args.memory_mb, env)
+                results[f"{mode}@{factor}x"] = result
+                print(f"{mode:10s} {factor:3d}x  {rows:9d} rows {size / 1e6:8.1f} MB raw  "
+                      f"RSS +{result['rss_growth_mb']:7.1f} MB  {result['seconds']:6.2f}s")
+    finally:
+        server.stop()
+
+    regressions = []
+    baseline = load_baseline("clean_memory") if args.compare else None
+    if baseline:
+        regressions = compare(results, baseline, ["rss_growth_mb", "seconds"])
+    if args.save:
+        save_baseline("clean_memory", results)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+#Benchmark to measure cold start cost of every Lambda handler in lambda_ingest/.
+#Each measurement runs in a fresh Python process so nothing is already imported.
+#Import time is measured without any mocks loaded; first-invocation latency is
+#measured against an empty moto S3 bucket (pip install moto), which exercises the
+#early "no input file" path of every stage.
+#Usage: python benchmarks/cold_start.py [--repeat 5] [--save] [--compare]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from baseline import load_baseline, save_baseline, compare
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT, "lambda_ingest")
+BUCKET = "vacc-disease-mlops-pipeline-argh"
+# Handlers that only get their import measured (ingestion calls the WHO API)
+IMPORT_ONLY = {"lambda_ingestion_handler"}
+
+IMPORT_CHILD = """
+import json, sys, time
+sys.path.insert(0, {lambda_dir!r})
+t0 = time.perf_counter()
+__import__({module!r})
+print(json.dumps({{"import_s": time.perf_counter() - t0}}))
+"""
+
+INVOKE_CHILD = """
+import json, os, sys, time
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+sys.path.insert(0, {lambda_dir!r})
+from moto import mock_aws
+with mock_aws():
+    import boto3
+    boto3.client("s3").create_bucket(Bucket={bucket!r})
+    module = __import__({module!r})
+    t0 = time.perf_counter()
+    try:
+        response = module.lambda_handler({{}}, None)
+        status = response.get("statusCode") if isinstance(response, dict) else None
+    except Exception as e:
+        status = type(e).__name__
+    print(json.dumps({{"invoke_s": time.perf_counter() - t0, "status": status}}))
+"""
+
+#Function to list the handler modules to benchmark.
+def list_handlers():
+    return sorted(f[:-3] for f in os.listdir(LAMBDA_DIR)
+                  if f.startswith("lambda_") and f.endswith(".py"))
+
+#Function to run one child process and return its JSON output.
+def run_child(code):
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT)
+    lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+    if out.returncode != 0 or not lines:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr else "no output")
+    return json.loads(lines[-1])
+
+#Main method to measure one handler.
+def measure(module, repeat):
+    imports = [run_child(IMPORT_CHILD.format(lambda_dir=LAMBDA_DIR, module=module))["import_s"]
+               for _ in range(repeat)]
+    result = {"import_s": statistics.median(imports)}
+    if module not in IMPORT_ONLY:
+        invokes = [run_child(INVOKE_CHILD.format(lambda_dir=LAMBDA_DIR, module=module, bucket=BUCKET))
+                   for _ in range(repeat)]
+        result["first_invoke_s"] = statistics.median(i["invoke_s"] for i in invokes)
+        result["status"] = invokes[-1]["status"]
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    args = parser.parse_args()
+
+    results = {}
+    for module in list_handlers():
+        try:
+            results[module] = measure(module, args.repeat)
+        except Exception as e:
+            print(f"❌ {module}: {e}")
+            continue
+        r = results[module]
+        invoke = f"{r['first_invoke_s']:.3f}s (status {r['status']})" if "first_invoke_s" in r else "skipped"
+        print(f"{module:45s} import {r['import_s']:.3f}s  first invocation {invoke}")
+
+    regressions = []
+    baseline = load_baseline("cold_start") if args.compare else None
+    if baseline:
+        regressions = compare(results, baseline, ["import_s", "first_invoke_s"])
+    if args.save:
+        save_baseline("cold_start", results)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+#Benchmark for the forecast/anomaly query module (lambda_ingest/forecast_query.py).
+#Publishes synthetic forecast and anomaly outputs to an in-process moto S3 bucket
+#(pip install moto), builds the indexes and measures per-query latency (p50/p99) and
+#throughput for point and range lookups, cold (LRU miss) and warm (LRU hit), against
+#filtering the full DataFrame with pandas and against re-downloading the CSV per query.
+#Usage: python benchmarks/query_latency.py [--countries 200] [--queries 20000] [--http] [--save] [--compare]
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+import numpy as np
+import pandas as pd
+from baseline import load_baseline, save_baseline, compare
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lambda_ingest"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+BUCKET = "vacc-disease-mlops-pipeline-argh"
+DISEASES = ["Measles", "Diphtheria", "Polio", "Hepatitis B"]
+PORT = 5125
+# Distinct queries repeated in the warm runs (anomaly queries use two LRU entries each)
+HOT_QUERIES = 1000
+
+#Function to build forecast and anomaly outputs shaped like the pipeline's.
+def make_outputs(countries, history_years=30, horizon=5, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = [f"C{i:04d}" for i in range(countries)]
+    forecast = pd.DataFrame([(c, d, 2025 + h) for c in codes for d in DISEASES for h in range(horizon)],
+                            columns=["country", "disease", "year"])
+    forecast["forecast"] = rng.random(len(forecast)) * 1000
+    forecast["model"] = rng.choice(["ARIMA", "ETS", "LinearRegression", "XGBoost"], len(forecast))
+    forecast["score"] = rng.random(len(forecast))
+    anomalies = pd.DataFrame([(f"Country {c}", 1995 + y, t, d) for c in codes for d in DISEASES
+                              for t in ("Vaccination", "Disease") for y in range(history_years)],
+                             columns=["country_name", "year", "type", "disease_name"])
+    anomalies["value"] = rng.random(len(anomalies)) * 100
+    anomalies["region"] = "Europe"
+    anomalies["continent"] = "Europe"
+    anomalies["change_pct"] = rng.normal(0, 0.5, len(anomalies))
+    anomalies["anomaly"] = np.where(anomalies["change_pct"] > 0.8, "sudden_spike",
+                                    np.where(anomalies["change_pct"] < -0.8, "sudden_drop", None))
+    return forecast, anomalies
+
+#Function to time every call of func over args and summarize per-call latency.
+def latency(func, args):
+    times = []
+    started = time.perf_counter()
+    for arg in args:
+        t0 = time.perf_counter()
+        func(*arg)
+        times.append(time.perf_counter() - t0)
+    total = time.perf_counter() - started
+    times.sort()
+    return {"p50_us": times[len(times) // 2] * 1e6, "p99_us": times[int(len(times) * 0.99)] * 1e6,
+            "qps": len(times) / total}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--countries", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--http", action="store_true", help="also measure round trips to the local HTTP handler")
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    args = parser.parse_args()
+
+    from moto import mock_aws
+    with mock_aws():
+        from s3_access import get_client, read_csv
+        from dataset_catalog import publish
+        from forecast_query import ForecastQuery, serve
+        get_client().create_bucket(Bucket=BUCKET)
+        forecast_df, anomaly_df = make_outputs(args.countries)
+        with contextlib.redirect_stdout(io.StringIO()):
+            publish(BUCKET, "forecasted_data", forecast_df, "20250101", "processed/forecast/")
+            publish(BUCKET, "grouped_combined_data", anomaly_df, "20250101", "aggregated/forecasting/")
+
+        query = ForecastQuery()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            query.refresh(force=True)
+        build_s = time.perf_counter() - t0
+        print(f"Indexed {len(forecast_df)} forecast + {len(anomaly_df)} anomaly rows in {build_s:.2f}s")
+
+        rng = np.random.default_rng(1)
+        countries = rng.integers(0, args.countries, args.queries)
+        diseases = rng.integers(0, len(DISEASES), args.queries)
+        point = [(f"C{c:04d}", DISEASES[d], 2025 + int(y)) for c, d, y in
+                 zip(countries, diseases, rng.integers(0, 5, args.queries))]
+        ranges = [(f"Country C{c:04d}", DISEASES[d], None, None, int(s), int(s) + 9) for c, d, s in
+                  zip(countries, diseases, rng.integers(1995, 2015, args.queries))]
+        unique_point = list(dict.fromkeys(point))
+        unique_ranges = list(dict.fromkeys(ranges))
+        # Warm runs repeat a hot set that fits in the LRU
+        hot_point = [unique_point[i % min(HOT_QUERIES, len(unique_point))] for i in range(args.queries)]
+        hot_ranges = [unique_ranges[i % min(HOT_QUERIES, len(unique_ranges))] for i in range(args.queries)]
+
+        results = {}
+        query.cache.clear()
+        results["point cold"] = latency(lambda c, d, y: query.forecast(c, d, year=y), unique_point)
+        results["point warm"] = latency(lambda c, d, y: query.forecast(c, d, year=y), hot_point)
+        query.cache.clear()
+        results["range cold"] = latency(query.anomalies, unique_ranges)
+        results["range warm"] = latency(query.anomalies, hot_ranges)
+
+        sample = point[:min(200, len(point))]
+        results["pandas filter"] = latency(
+            lambda c, d, y: forecast_df[(forecast_df["country"] == c) & (forecast_df["disease"] == d)
+                                        & (forecast_df["year"] == y)].to_dict("records"), sample)
+        results["download + scan"] = latency(
+            lambda c, d, y: (lambda df: df[(df["country"] == c) & (df["disease"] == d) & (df["year"] == y)])(
+                read_csv(BUCKET, "processed/forecast/forecasted_data_20250101.csv")), sample[:20])
+
+        if args.http:
+            server = serve(PORT, query)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            def http_get(c, d, y):
+                url = f"http://127.0.0.1:{PORT}/forecast?country={c}&disease={d.replace(' ', '%20')}&year={y}"
+                with urllib.request.urlopen(url) as response:
+                    json.loads(response.read())
+            results["http point"] = latency(http_get, point[:2000])
+            server.shutdown()
+
+        # Refresh after a new version is published
+        forecast_df["forecast"] += 1
+        with contextlib.redirect_stdout(io.StringIO()):
+            publish(BUCKET, "forecasted_data", forecast_df, "20250102", "processed/forecast/")
+            t0 = time.perf_counter()
+            query.refresh(force=True)
+        refresh_s = time.perf_counter() - t0
+        fresh = query.forecast(*point[0][:2], year=point[0][2])[0]["forecast"]
+        expected = forecast_df[(forecast_df["country"] == point[0][0]) & (forecast_df["disease"] == point[0][1])
+                               & (forecast_df["year"] == point[0][2])]["forecast"].iloc[0]
+        print(f"Refresh after new version: {refresh_s:.2f}s, serves new values: {abs(fresh - expected) < 1e-9}")
+
+    for case, values in results.items():
+        print(f"{case:16s} p50 {values['p50_us']:10.1f} µs  p99 {values['p99_us']:10.1f} µs  "
+              f"{values['qps']:12.0f} queries/s")
+    print(f"LRU: {query.hits} hits, {query.misses} misses")
+
+    regressions = []
+    baseline = load_baseline("query_latency") if args.compare else None
+    if baseline:
+        regressions = compare(results, baseline, ["p50_us", "p99_us"])
+    if args.save:
+        save_baseline("query_latency", results)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
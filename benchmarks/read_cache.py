@@ -0,0 +1,146 @@
+#Benchmark for the local read-through S3 cache (lambda_ingest/s3_cache.py).
+#Uploads synthetic CSV objects to a local moto S3 server (pip install "moto[server]") and
+#reads them all in fresh processes, like repeat runs of the scripts/: a cold run (all
+#misses), a warm run (304 Not Modified, read from disk), a run after --changed of the
+#objects were rewritten, --processes runs at once on a cold cache (atomic renames, no
+#partial files) and a run with a size limit below the data (LRU eviction). Response
+#bytes are counted with a botocore hook in each process; warm runs should transfer none.
+#Usage: python benchmarks/read_cache.py [--objects 8] [--rows 100000] [--processes 4] [--save] [--compare]
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import boto3
+from baseline import load_baseline, save_baseline, compare
+from synthetic_data import generate_category
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT, "lambda_ingest")
+BUCKET = "vacc-disease-mlops-pipeline-argh"
+PORT = 5127
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {lambda_dir!r})
+import s3_cache
+from s3_access import get_client, read_csv
+s3_cache.enable({cache_dir!r}, {max_mb!r})
+transferred = [0]
+def count(http_response, parsed, **kwargs):
+    # Body bytes of the responses (a 304 Not Modified has none); the stream is left unread
+    if http_response.status_code == 200:
+        transferred[0] += parsed.get("ContentLength", 0)
+get_client().meta.events.register("after-call.s3.GetObject", count)
+t0 = time.perf_counter()
+rows = sum(len(read_csv({bucket!r}, key)) for key in {keys!r})
+stats = dict(s3_cache.stats)
+stats.update(seconds=time.perf_counter() - t0, rows=rows, transferred=transferred[0])
+print(json.dumps(stats))
+"""
+
+#Function to upload the objects; returns their keys and total size.
+def upload(s3, objects, rows, version=0):
+    keys, size = [], 0
+    per_object = max(1, rows // 25)
+    for i in range(objects):
+        df = next(iter(generate_category("disease", per_object, 1, 25, seed=i + version).values()))
+        body = df.to_csv(index=False).encode()
+        keys.append(f"raw/disease/object{i:03d}_20000101.csv")
+        s3.put_object(Bucket=BUCKET, Key=keys[-1], Body=body)
+        size += len(body)
+    return keys, size
+
+#Function to start reader processes at once and collect their results.
+def run_children(keys, cache_dir, max_mb, env, processes=1):
+    code = CHILD.format(lambda_dir=LAMBDA_DIR, cache_dir=cache_dir, max_mb=max_mb, bucket=BUCKET, keys=keys)
+    children = [subprocess.Popen([sys.executable, "-c", code], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                 text=True, env=env, cwd=ROOT) for _ in range(processes)]
+    results = []
+    for child in children:
+        out, err = child.communicate()
+        lines = [line for line in out.splitlines() if line.startswith("{")]
+        if child.returncode != 0 or not lines:
+            raise RuntimeError(err.strip().splitlines()[-1] if err else "no output")
+        results.append(json.loads(lines[-1]))
+    return results
+
+#Function to check that every cached object is complete (no partial writes under concurrency).
+def cache_is_whole(s3, keys, cache_dir):
+    sys.path.insert(0, LAMBDA_DIR)
+    import s3_cache
+    s3_cache.enable(cache_dir)
+    for key in keys:
+        head = s3.head_object(Bucket=BUCKET, Key=key)
+        path = s3_cache.object_path(s3_cache.address(BUCKET, key, head["ETag"]))
+        if not os.path.exists(path) or os.path.getsize(path) != head["ContentLength"]:
+            return False
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--objects", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=100000, help="rows per object")
+    parser.add_argument("--changed", type=float, default=0.25, help="share of objects rewritten")
+    parser.add_argument("--processes", type=int, default=4, help="readers started at once on a cold cache")
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    args = parser.parse_args()
+
+    from moto.server import ThreadedMotoServer
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=PORT, verbose=False)
+    server.start()
+    env = dict(os.environ, AWS_ENDPOINT_URL_S3=f"http://127.0.0.1:{PORT}", AWS_DEFAULT_REGION="us-east-1",
+               AWS_ACCESS_KEY_ID="testing", AWS_SECRET_ACCESS_KEY="testing")
+    env.pop("S3_CACHE_DIR", None)
+    s3 = boto3.client("s3", endpoint_url=env["AWS_ENDPOINT_URL_S3"], region_name="us-east-1",
+                      aws_access_key_id="testing", aws_secret_access_key="testing")
+    s3.create_bucket(Bucket=BUCKET)
+    work_dir = tempfile.mkdtemp(prefix="s3-cache-bench-")
+    results = {}
+    try:
+        keys, size = upload(s3, args.objects, args.rows)
+        max_mb = 4 * size / 1e6
+        cache_dir = os.path.join(work_dir, "cache")
+        results["cold"] = run_children(keys, cache_dir, max_mb, env)[0]
+        results["warm"] = run_children(keys, cache_dir, max_mb, env)[0]
+        changed = max(1, int(args.objects * args.changed))
+        upload(s3, changed, args.rows, version=1000)
+        results[f"{changed} changed"] = run_children(keys, cache_dir, max_mb, env)[0]
+        # Readers racing on an empty cache: every one misses, all must see whole files
+        shared_dir = os.path.join(work_dir, "shared")
+        racing = run_children(keys, shared_dir, max_mb, env, args.processes)
+        results[f"{args.processes} at once"] = dict(racing[0], seconds=max(r["seconds"] for r in racing),
+                                                    transferred=sum(r["transferred"] for r in racing),
+                                                    misses=sum(r["misses"] for r in racing),
+                                                    hits=sum(r["hits"] for r in racing))
+        whole = cache_is_whole(s3, keys, shared_dir)
+        results[f"{args.processes} at once, warm"] = run_children(keys, shared_dir, max_mb, env)[0]
+        # A limit of half the data: every run evicts, so the next one misses again
+        small_dir = os.path.join(work_dir, "small")
+        run_children(keys, small_dir, size / 2e6, env)
+        results["half-size limit"] = run_children(keys, small_dir, size / 2e6, env)[0]
+    finally:
+        server.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{args.objects} objects, {size / 1e6:.1f} MB")
+    for case, values in results.items():
+        print(f"{case:22s} {values['seconds']:7.2f}s  {values['hits']:3d} hits {values['misses']:3d} misses  "
+              f"{values['transferred'] / 1e6:7.1f} MB transferred  {values['evicted']:3d} evicted")
+    print(f"Concurrent readers left whole files: {whole}")
+
+    regressions = []
+    baseline = load_baseline("read_cache") if args.compare else None
+    if baseline:
+        regressions = compare(results, baseline, ["seconds", "transferred"])
+    if args.save:
+        save_baseline("read_cache", results)
+    return 1 if regressions or not whole else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#Benchmark for hierarchical forecast reconciliation (lambda_ingest/lambda_reconcile_forecasts.py).
+#Builds synthetic country forecasts and history over the country → region → continent
+#hierarchy, reconciles every (disease, year) horizon with the batched sparse/einsum
+#implementation and with a per-group loop (pandas filter + dense projection per group),
+#checks that both agree and that the results are coherent, and reports the times.
+#Usage: python benchmarks/reconciliation.py [--countries 200,1000] [--diseases 4] [--save] [--compare]
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from baseline import load_baseline, save_baseline, compare
+from synthetic_data import REGIONS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lambda_ingest"))
+CONTINENTS = ["Africa", "Americas", "Asia", "Europe", "Oceania"]
+HISTORY_YEARS = range(1995, 2025)
+HORIZON = 5
+
+#Function to build forecast-input history and country forecasts shaped like the pipeline's.
+def make_inputs(countries, diseases, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = [f"C{i:04d}" for i in range(countries)]
+    names = [f"Disease{d}" for d in range(diseases)]
+    index = pd.MultiIndex.from_product([codes, names, HISTORY_YEARS], names=["country", "disease_name", "year"])
+    df = index.to_frame(index=False)
+    country_idx = df["country"].str[1:].astype(int)
+    df["region"] = np.array(REGIONS)[country_idx % len(REGIONS)]
+    df["continent"] = np.array(CONTINENTS)[country_idx % len(CONTINENTS)]
+    df["type"] = "Disease"
+    df["value"] = rng.lognormal(6, 1.5, countries * diseases)[np.arange(len(df)) // len(HISTORY_YEARS)] \
+        * (1 + rng.normal(0, 0.2, len(df)))
+    forecasts = pd.DataFrame([(c, d, HISTORY_YEARS[-1] + h) for c in codes for d in names
+                              for h in range(1, HORIZON + 1)], columns=["country", "disease", "year"])
+    forecasts["forecast"] = rng.lognormal(6, 1.5, len(forecasts))
+    # Some series have no forecast (too short to fit)
+    forecasts = forecasts[rng.random(len(forecasts)) > 0.05].reset_index(drop=True)
+    return df, forecasts
+
+#Function to reconcile one (disease, year) group at a time with a dense projection.
+def loop_reconcile(forecasts, df, method):
+    import lambda_reconcile_forecasts as rec
+    rows = []
+    for (disease, year), group in forecasts.groupby(["disease", "year"]):
+        countries = sorted(group["country"])
+        nodes, A = rec.summing_matrix(rec.country_hierarchy(df, countries))
+        dense = A.toarray()
+        S = np.vstack([dense, np.eye(len(countries))])
+        base_b = group.set_index("country").loc[countries, "forecast"].to_numpy()
+        history = df[df["disease_name"] == disease].pivot_table(index="country", columns="year", values="value")
+        cube = history.loc[countries].to_numpy()
+        steps = np.diff(cube[:, -(rec.DRIFT_YEARS + 1):], axis=1)
+        drift_b = cube[:, -1] + steps.mean(axis=1) * (year - HISTORY_YEARS[-1])
+        # Aggregate variances come from the history of every country forecast for the disease
+        forecast_for = sorted(forecasts.loc[forecasts["disease"] == disease, "country"].unique())
+        all_nodes, A_all = rec.summing_matrix(rec.country_hierarchy(df, forecast_for))
+        aggregated = A_all.toarray() @ history.loc[forecast_for].to_numpy()
+        variance = dict(zip(all_nodes, np.diff(aggregated[:, -(rec.DRIFT_YEARS + 1):], axis=1).var(axis=1)))
+        if method == "ols":
+            weights = np.ones(len(nodes) + len(countries))
+        else:
+            weights = np.r_[[variance[node] for node in nodes], steps.var(axis=1)]
+        inverse = np.diag(1 / np.maximum(weights, rec.MIN_VARIANCE))
+        base = np.r_[dense @ drift_b, base_b]
+        reconciled = S @ np.linalg.solve(S.T @ inverse @ S, S.T @ inverse @ base)
+        rows += [(level, name, disease, year, value) for (level, name), value in
+                 zip(nodes + [("country", c) for c in countries], reconciled)]
+    return pd.DataFrame(rows, columns=["level", "node", "disease", "year", method])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--countries", default="200,1000")
+    parser.add_argument("--diseases", type=int, default=4)
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    args = parser.parse_args()
+    import lambda_reconcile_forecasts as rec
+
+    results = {}
+    for countries in [int(c) for c in args.countries.split(",")]:
+        df, forecasts = make_inputs(countries, args.diseases)
+        for method in ("bottom_up", "ols", "mint"):
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                out = rec.reconcile_forecasts(forecasts, df, [method])
+                batched_s = time.perf_counter() - started
+            wide = out.pivot_table(index=["level", "node"], columns=["disease", "year"], values=method)
+            incoherence = np.nanmax(np.abs(wide.loc[("total", rec.TOTAL)] - wide.loc["country"].sum()))
+            case = {"batched_s": batched_s, "rows": len(out), "incoherence": float(incoherence)}
+            if method != "bottom_up":
+                started = time.perf_counter()
+                reference = loop_reconcile(forecasts, df, method)
+                case["loop_s"] = time.perf_counter() - started
+                merged = out.merge(reference, on=["level", "node", "disease", "year"], suffixes=("", "_loop"))
+                case["max_diff"] = float((merged[method] - merged[f"{method}_loop"]).abs().max())
+            results[f"{method}@{countries}"] = case
+            loop = (f"  loop {case['loop_s']:7.3f}s ({case['loop_s'] / batched_s:5.1f}x)  "
+                    f"max diff {case['max_diff']:.1e}") if "loop_s" in case else ""
+            print(f"{method:9s} {countries:5d} countries {case['rows']:7d} rows  batched {batched_s:7.3f}s"
+                  f"{loop}  incoherence {incoherence:.1e}")
+
+    regressions = []
+    baseline = load_baseline("reconciliation") if args.compare else None
+    if baseline:
+        regressions = compare(results, baseline, ["batched_s"])
+    if args.save:
+        save_baseline("reconciliation", results)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+#Benchmark for S3 reads and writes: per-call clients with in-memory bodies vs the
+#shared tuned client in lambda_ingest/s3_access.py.
+#Runs against a local moto S3 server (pip install "moto[server]") over real HTTP, so
+#client creation, connection reuse and multipart transfers are all exercised.
+#  old -> new boto3 client per call, to_csv into a string + put_object,
+#         get_object Body.read() + BytesIO before read_csv
+#  new -> get_client(), write_csv (spooled file; multipart above MULTIPART_THRESHOLD),
+#         read_csv (streamed body; parallel ranged GETs above MULTIPART_THRESHOLD)
+#Reports wall time and Python heap peak (tracemalloc) for every CSV size. The local
+#server has no per-connection bandwidth cap, so multipart only shows its cost here;
+#the gains it measures are client reuse and the smaller heap of streamed transfers.
+#Usage: python benchmarks/s3_transfer.py [--sizes-mb 1,8,40] [--repeat 3] [--save] [--compare]
+import argparse
+import io
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from baseline import load_baseline, save_baseline, compare
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lambda_ingest"))
+BUCKET = "vacc-disease-mlops-pipeline-argh"
+PORT = 5124
+DEFAULT_SIZES = "1,8,40"
+# Small calls issued back to back, as the stages do when listing/reading many files
+SMALL_CALLS = 20
+
+#Function to point boto3 at the local S3 server before any client is created.
+def start_server():
+    from moto.server import ThreadedMotoServer
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=PORT, verbose=False)
+    server.start()
+    os.environ["AWS_ENDPOINT_URL_S3"] = f"http://127.0.0.1:{PORT}"
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+    return server
+
+#Function to build a forecast-shaped DataFrame of roughly size_mb of CSV.
+def make_frame(size_mb, seed=0):
+    rows = int(size_mb * 1024 * 1024 / 48)
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "country": rng.choice(["USA", "BRA", "IND", "NGA", "FRA"], rows),
+        "disease": rng.choice(["Measles", "Polio", "Diphtheria"], rows),
+        "year": rng.integers(1980, 2030, rows),
+        "value": rng.random(rows) * 1000,
+        "model": rng.choice(["ARIMA", "ETS", "XGBoost"], rows),
+    })
+
+def old_write(df, key):
+    import boto3
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False)
+    boto3.client("s3").put_object(Bucket=BUCKET, Key=key, Body=buffer.getvalue())
+
+def old_read(key):
+    import boto3
+    obj = boto3.client("s3").get_object(Bucket=BUCKET, Key=key)
+    return pd.read_csv(io.BytesIO(obj["Body"].read()))
+
+def old_list():
+    import boto3
+    return boto3.client("s3").list_objects_v2(Bucket=BUCKET, Prefix="bench/")
+
+def new_write(df, key):
+    from s3_access import write_csv
+    write_csv(df, BUCKET, key)
+
+def new_read(key):
+    from s3_access import read_csv
+    return read_csv(BUCKET, key)
+
+def new_list():
+    from s3_access import list_keys
+    return list_keys(BUCKET, "bench/")
+
+#Function to time old vs new (median of repeats, alternating which runs first so
+#neither pays for the other's garbage) and measure each heap peak once.
+def measure(variants, repeat):
+    times = {name: [] for name in variants}
+    for run in range(repeat):
+        order = list(variants.items())
+        for name, func in order if run % 2 == 0 else order[::-1]:
+            started = time.perf_counter()
+            func()
+            times[name].append(time.perf_counter() - started)
+    results = {}
+    for name, func in variants.items():
+        tracemalloc.start()
+        func()
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        results[name] = {"seconds": statistics.median(times[name]), "peak_mb": peak_mb}
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes-mb", default=DEFAULT_SIZES, help="CSV sizes in MB, comma separated")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    args = parser.parse_args()
+
+    server = start_server()
+    try:
+        from s3_access import get_client
+        get_client().create_bucket(Bucket=BUCKET)
+        results = {}
+        for size_mb in [float(size) for size in args.sizes_mb.split(",")]:
+            df = make_frame(size_mb)
+            key = f"bench/frame_{size_mb:g}mb.csv"
+            cases = {
+                f"write@{size_mb:g}MB": {"old": lambda: old_write(df, key), "new": lambda: new_write(df, key)},
+                f"read@{size_mb:g}MB": {"old": lambda: old_read(key), "new": lambda: new_read(key)},
+            }
+            for case, variants in cases.items():
+                for variant, values in measure(variants, args.repeat).items():
+                    results[f"{case}:{variant}"] = values
+        small = {"old": lambda: [old_list() for _ in range(SMALL_CALLS)],
+                 "new": lambda: [new_list() for _ in range(SMALL_CALLS)]}
+        for variant, values in measure(small, args.repeat).items():
+            results[f"list x{SMALL_CALLS}:{variant}"] = values
+    finally:
+        server.stop()
+
+    for case in dict.fromkeys(name.rsplit(":", 1)[0] for name in results):
+        old, new = results[f"{case}:old"], results[f"{case}:new"]
+        speedup = old["seconds"] / new["seconds"] if new["seconds"] else float("nan")
+        print(f"{case:15s} old {old['seconds']:7.3f}s {old['peak_mb']:8.1f} MB  "
+              f"new {new['seconds']:7.3f}s {new['peak_mb']:8.1f} MB  ({speedup:.2f}x)")
+
+    regressions = []
+    baseline = load_baseline("s3_transfer") if args.compare else None
+    if baseline:
+        regressions = compare(results, baseline, ["seconds", "peak_mb"])
+    if args.save:
+        save_baseline("s3_transfer", results)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,150 @@
+#Benchmark suite for the pipeline stages at several data scales.
+#Generates synthetic GHO-shaped raw data (synthetic_data.py), loads it into an
+#in-process moto S3 bucket (pip install moto) and runs each stage in order:
+#  clean     -> process_category (vaccination + disease)
+#  eda       -> execute_data_improvement + det_clean_outliers
+#  aggregate -> aggregate_and_flag (groupby + detect_anomalies)
+#  forecast  -> generate_forecast_models (on --forecast-share of the countries, so it scales too)
+#Every stage is timed in one pass and its Python heap peak (tracemalloc) measured
+#in a second pass. Reports throughput, peak memory and a log-log scaling exponent.
+#Usage: python benchmarks/stage_benchmarks.py [--scales 25x2x20,50x4x25] [--forecast-share 0.2] [--save] [--compare]
+import argparse
+import contextlib
+import io
+import math
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+from baseline import load_baseline, save_baseline, compare
+from synthetic_data import generate_raw, COUNTRY_CODES_FILE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lambda_ingest"))
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+BUCKET = "vacc-disease-mlops-pipeline-argh"
+DEFAULT_SCALES = "25x2x20,50x4x25,100x4x30"
+
+#Function to parse "countriesxindicatorsxyears" scale strings.
+def parse_scales(text):
+    return [tuple(int(part) for part in scale.split("x")) for scale in text.split(",")]
+
+#Function to time one call and, in a second pass, measure its heap peak.
+def measure(func, memory=True):
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - started
+        peak_mb = None
+        if memory:
+            tracemalloc.start()
+            func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+    return result, seconds, peak_mb
+
+#Function to load raw files and the country codes into the mocked bucket.
+def upload_raw(s3, raw):
+    s3.put_object(Bucket=BUCKET, Key="country_codes/country_codes.csv",
+                  Body=open(COUNTRY_CODES_FILE, "rb").read())
+    rows = 0
+    for category, frames in raw.items():
+        for name, df in frames.items():
+            s3.put_object(Bucket=BUCKET, Key=f"raw/{category}/{name}_20000101.csv",
+                          Body=df.to_csv(index=False))
+            rows += len(df)
+    return rows
+
+#Main method to run every stage at one scale.
+def run_scale(scale, forecast_share, memory):
+    import boto3
+    import lambda_clean_handler as clean
+    import lambda_eda_vacc_disease_data as eda
+    import lambda_aggregate_and_flag_anomalies as agg
+    import lambda_forecast_disease_trends as forecast
+
+    countries, indicators, years = scale
+    s3 = boto3.client("s3")
+    s3.create_bucket(Bucket=BUCKET)
+    raw_rows = upload_raw(s3, generate_raw(countries, indicators, years))
+    stats = {}
+
+    def clean_stage():
+        clean.process_category("vaccination")
+        clean.process_category("disease")
+    _, seconds, peak = measure(clean_stage, memory)
+    stats["clean"] = {"rows_in": raw_rows, "seconds": seconds, "peak_mb": peak}
+
+    vacc_df = clean.download_csv(f"processed/vaccination/processed_vaccination_{eda.tmstamp}.csv")
+    disease_df = clean.download_csv(f"processed/disease/processed_disease_{eda.tmstamp}.csv")
+    def eda_stage():
+        combined = eda.execute_data_improvement(vacc_df.copy(), disease_df.copy())
+        return eda.det_clean_outliers(combined)[0]
+    cleaned, seconds, peak = measure(eda_stage, memory)
+    stats["eda"] = {"rows_in": len(vacc_df) + len(disease_df), "seconds": seconds, "peak_mb": peak}
+
+    _, seconds, peak = measure(lambda: agg.aggregate_and_flag(cleaned), memory)
+    stats["aggregate"] = {"rows_in": len(cleaned), "seconds": seconds, "peak_mb": peak}
+
+    # Fitting every series is slow, so the forecast runs on a share of the countries of each scale
+    forecast_countries = max(1, round(cleaned["country"].nunique() * forecast_share))
+    subset = cleaned[cleaned["country"].isin(cleaned["country"].drop_duplicates()[:forecast_countries])]
+    _, seconds, peak = measure(lambda: forecast.generate_forecast_models(subset, use_cache=False), memory)
+    stats["forecast"] = {"rows_in": len(subset), "seconds": seconds, "peak_mb": peak}
+
+    for stage in stats.values():
+        stage["rows_per_s"] = stage["rows_in"] / stage["seconds"] if stage["seconds"] else None
+    return stats
+
+#Function to estimate how time grows with input rows (1.0 = linear).
+def scaling_exponent(points):
+    (r0, t0), (r1, t1) = points[0], points[-1]
+    if r1 == r0 or t0 <= 0 or t1 <= 0:
+        return None
+    return math.log(t1 / t0) / math.log(r1 / r0)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help="countriesxindicatorsxyears, comma separated")
+    parser.add_argument("--forecast-share", type=float, default=0.2, help="share of countries forecast")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    args = parser.parse_args()
+
+    from moto import mock_aws
+    # Import the model libraries up front so the first scale does not pay for them
+    import statsmodels.tsa.statespace.sarimax, statsmodels.tsa.holtwinters
+    import sklearn.linear_model, sklearn.metrics, xgboost
+    warnings.simplefilter("ignore")
+    results = {}
+    curves = {}
+    for scale in parse_scales(args.scales):
+        label = "x".join(str(part) for part in scale)
+        with mock_aws():
+            stats = run_scale(scale, args.forecast_share, not args.no_memory)
+        for stage, values in stats.items():
+            results[f"{stage}@{label}"] = values
+            curves.setdefault(stage, []).append((values["rows_in"], values["seconds"]))
+            peak = f"{values['peak_mb']:8.1f} MB" if values["peak_mb"] is not None else "       -"
+            print(f"{stage:10s} {label:12s} rows {values['rows_in']:9d}  {values['seconds']:8.3f}s  "
+                  f"{values['rows_per_s']:12.0f} rows/s  peak {peak}")
+
+    print("\nScaling (time exponent vs input rows, 1.0 = linear):")
+    for stage, points in curves.items():
+        exponent = scaling_exponent(points)
+        print(f"-> {stage:10s} {exponent:.2f}" if exponent is not None else f"-> {stage:10s} n/a")
+
+    regressions = []
+    baseline = load_baseline("stages") if args.compare else None
+    if baseline:
+        regressions = compare(results, baseline, ["seconds", "peak_mb"])
+    if args.save:
+        save_baseline("stages", results)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#Generator of synthetic WHO GHO-shaped raw records for benchmarks.
+#Produces the same columns the ingestion stage stores under raw/{category}/
+#(IndicatorCode, SpatialDim, ParentLocation, TimeDim, Value, ...) for a configurable
+#number of countries x indicators x years, with injected nulls and outliers.
+import os
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+COUNTRY_CODES_FILE = os.path.join(ROOT, "data", "country_codes", "country_codes.csv")
+REGIONS = ["Africa", "Americas", "Eastern Mediterranean", "Europe", "South-East Asia", "Western Pacific"]
+# Extra GHO columns carried by real raw files (mostly unused downstream)
+# Real GHO indicator codes (lambda_ingestion_handler.py) come first so the records pass
+# the known_indicator validation rule; synthetic codes beyond that
+INDICATOR_CODES = {"vaccination": ["WHS4_100", "WHS8_110", "WHS4_544", "WHS4_117"],
+                   "disease": ["WHS3_62", "WHS3_41", "WHS3_49", "HEPATITIS_HBV_INFECTIONS_NEW_NUM"]}
+EXTRA_COLUMNS = ["Id", "SpatialDimType", "TimeDimType", "ParentLocationCode", "Dim1Type",
+                 "Dim1", "NumericValue", "Low", "High", "Comments", "Date", "TimeDimensionValue"]
+
+#Function to get country codes; real ISO3 codes first, synthetic ones beyond that.
+def country_codes(count):
+    codes = pd.read_csv(COUNTRY_CODES_FILE)["code_3"].dropna().tolist()
+    extra = [f"Z{i // 26 % 26 + 65:c}{i % 26 + 65:c}" for i in range(max(0, count - len(codes)))]
+    return (codes + extra)[:count]
+
+#Main method to generate raw records for one category.
+def generate_category(category, countries=50, indicators=4, years=20, first_year=2000,
+                      null_rate=0.02, outlier_rate=0.01, seed=0):
+    """Return {indicator_name: DataFrame} shaped like raw/{category}/{name}_{date}.csv."""
+    rng = np.random.default_rng(seed + (0 if category == "vaccination" else 1))
+    codes = np.array(country_codes(countries))
+    regions = np.array([REGIONS[i % len(REGIONS)] for i in range(countries)])
+    year_values = np.arange(first_year, first_year + years)
+    frames = {}
+    for i in range(indicators):
+        name = f"indicator{i:02d}"
+        known = INDICATOR_CODES[category]
+        code = known[i] if i < len(known) else f"{'WHS4' if category == 'vaccination' else 'WHS3'}_{100 + i}"
+        country_idx = np.repeat(np.arange(countries), years)
+        year_col = np.tile(year_values, countries)
+        if category == "vaccination":
+            # Coverage in percent with a slow upward drift
+            base = rng.uniform(40, 95, countries)[country_idx]
+            value = np.clip(base + (year_col - first_year) * 0.5 + rng.normal(0, 3, len(year_col)), 0, 100)
+        else:
+            # Reported case counts, log-normal across countries
+            base = rng.lognormal(6, 2, countries)[country_idx]
+            value = np.maximum(0, base * (1 + rng.normal(0, 0.2, len(year_col))))
+        n = len(value)
+        outliers = rng.random(n) < outlier_rate
+        value[outliers] *= rng.uniform(20, 100, outliers.sum())
+        value = value.round(1)
+        df = pd.DataFrame({
+            "IndicatorCode": code,
+            "SpatialDim": codes[country_idx],
+            "ParentLocation": regions[country_idx],
+            "TimeDim": year_col,
+            "Value": value,
+        })
+        for col in EXTRA_COLUMNS:
+            df[col] = None
+        df["Id"] = np.arange(n) + i * n
+        df["NumericValue"] = df["Value"]
+        df["SpatialDimType"] = "COUNTRY"
+        df["TimeDimType"] = "YEAR"
+        # Inject nulls into the columns the cleaning stage filters on
+        for col in ("Value", "SpatialDim", "TimeDim"):
+            df.loc[rng.random(n) < null_rate, col] = None
+        frames[name] = df
+    return frames
+
+#Function to generate both categories at one scale.
+def generate_raw(countries=50, indicators=4, years=20, null_rate=0.02, outlier_rate=0.01, seed=0):
+    return {category: generate_category(category, countries, indicators, years,
+                                        null_rate=null_rate, outlier_rate=outlier_rate, seed=seed)
+            for category in ("vaccination", "disease")}
+
+if __name__ == "__main__":
+    raw = generate_raw()
+    for category, frames in raw.items():
+        for name, df in frames.items():
+            print(category, name, df.shape)
@@ -0,0 +1,104 @@
+#Benchmark for the overhead of the validation rules (lambda_ingest/validation.py) on the cleaning stage.
+#Uploads synthetic raw files (synthetic_data.py) and a country_codes file covering their
+#codes to an in-process moto S3 bucket (pip install moto), then cleans one category with
+#no rules and with all rules, in-memory and chunked, and times validate() alone on the
+#typed rows. The rules should add a small share to the cleaning time.
+#Usage: python benchmarks/validation_overhead.py [--countries 250,1000] [--repeat 5] [--save] [--compare]
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import pandas as pd
+from baseline import load_baseline, save_baseline, compare
+from synthetic_data import generate_category, country_codes
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lambda_ingest"))
+BUCKET = "vacc-disease-mlops-pipeline-argh"
+CATEGORY = "vaccination"
+
+#Function to replace the raw files of the category and the country codes with a new scale.
+def upload_inputs(s3, countries, indicators, years):
+    for key in [obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET).get("Contents", [])]:
+        s3.delete_object(Bucket=BUCKET, Key=key)
+    codes = country_codes(countries)
+    s3.put_object(Bucket=BUCKET, Key="country_codes/country_codes.csv",
+                  Body=pd.DataFrame({"country": codes, "code_3": codes, "continent": "Europe"}).to_csv(index=False))
+    total = 0
+    for name, df in generate_category(CATEGORY, countries, indicators, years).items():
+        s3.put_object(Bucket=BUCKET, Key=f"raw/{CATEGORY}/{name}_20000101.csv", Body=df.to_csv(index=False))
+        total += len(df)
+    return total
+
+#Function to clean the category once and time it.
+def timed_clean(clean, chunked):
+    with contextlib.redirect_stdout(io.StringIO()):
+        started = time.perf_counter()
+        clean.process_category(CATEGORY, chunked=chunked)
+        return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--countries", default="250,1000")
+    parser.add_argument("--indicators", type=int, default=4)
+    parser.add_argument("--years", type=int, default=25, help="years from 2000 (later ones break year_range)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", action="store_true", help="store results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    args = parser.parse_args()
+
+    from moto import mock_aws
+    with mock_aws():
+        from s3_access import get_client
+        import lambda_clean_handler as clean
+        import validation
+        from schemas import read_dataset
+        from dataset_catalog import latest
+        s3 = get_client()
+        s3.create_bucket(Bucket=BUCKET)
+        all_rules = validation.ACTIVE_RULES
+        results = {}
+        for countries in [int(c) for c in args.countries.split(",")]:
+            rows = upload_inputs(s3, countries, args.indicators, args.years)
+            validation._references.clear()
+            for mode, chunked in (("in-memory", False), ("chunked", True)):
+                # Alternate the runs so drift (S3 mock, caches) hits both alike; keep the fastest
+                times = {"without": [], "with": []}
+                for _ in range(args.repeat):
+                    for label, rules in (("without", []), ("with", all_rules)):
+                        validation.ACTIVE_RULES = rules
+                        times[label].append(timed_clean(clean, chunked))
+                without, with_rules = min(times["without"]), min(times["with"])
+                results[f"{mode}@{countries}"] = {"rows": rows, "without_s": without, "with_s": with_rules,
+                                                  "overhead_pct": 100 * (with_rules - without) / without}
+            # The rules alone, on the typed rows of the last run
+            with contextlib.redirect_stdout(io.StringIO()):
+                typed = read_dataset(BUCKET, latest(BUCKET, f"processed_{CATEGORY}")["key"], f"processed_{CATEGORY}")
+            references = validation.load_references(BUCKET)
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                _, quarantined, _ = validation.validate(typed, references)
+            validate_s = (time.perf_counter() - started) / args.repeat
+            results[f"validate@{countries}"] = {"rows": len(typed), "validate_s": validate_s,
+                                                "rows_per_s": len(typed) / validate_s}
+            quarantine = latest(BUCKET, f"processed_{CATEGORY}_quarantine")
+
+            for mode in ("in-memory", "chunked"):
+                values = results[f"{mode}@{countries}"]
+                print(f"{mode:10s} {countries:5d} countries {rows:8d} rows  no rules {values['without_s']:6.2f}s  "
+                      f"rules {values['with_s']:6.2f}s  overhead {values['overhead_pct']:+5.1f}%")
+            print(f"validate   {countries:5d} countries {len(typed):8d} rows  {validate_s * 1000:7.1f} ms  "
+                  f"{len(typed) / validate_s / 1e6:6.1f} M rows/s  ({quarantine['rows']} rows quarantined)")
+
+    regressions = []
+    baseline = load_baseline("validation_overhead") if args.compare else None
+    if baseline:
+        regressions = compare(results, baseline, ["with_s", "validate_s"])
+    if args.save:
+        save_baseline("validation_overhead", results)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
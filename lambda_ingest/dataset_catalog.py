@@ -0,0 +1,108 @@
+#File with the dataset catalog: one manifest per published dataset version.
+#Producing stages publish through here; each version gets an immutable manifest
+#(version, key, row count, schema, content hash) and a small "latest" pointer, so
+#consumers find the newest version with one GET instead of listing the prefix.
+#Outputs written before the catalog existed are still found by a fallback scan.
+#Layout: catalog/{dataset}/latest.json and catalog/{dataset}/versions/{YYYYMMDD}.json
+import json
+import re
+from datetime import datetime
+from datetime import timezone as timz
+from s3_access import get_client, list_keys, write_csv
+
+# Catalog config
+CATALOG_PREFIX = "catalog/"
+
+#Function to build the manifest key of one dataset version.
+def manifest_key(dataset, version):
+    return f"{CATALOG_PREFIX}{dataset}/versions/{version}.json"
+
+#Function to build the key of the latest-version pointer.
+def pointer_key(dataset):
+    return f"{CATALOG_PREFIX}{dataset}/latest.json"
+
+#Function to build the data key of a version (e.g. processed/forecast/forecasted_data_20250101.csv).
+def data_key(prefix, dataset, version):
+    return f"{prefix}{dataset}_{version}.csv"
+
+def _get_json(bucket, key):
+    try:
+        obj = get_client().get_object(Bucket=bucket, Key=key)
+    except get_client().exceptions.NoSuchKey:
+        return None
+    return json.loads(obj["Body"].read())
+
+def _put_json(bucket, key, entry):
+    # A single PUT replaces the object atomically: readers see the old or the new entry
+    get_client().put_object(Bucket=bucket, Key=key, Body=json.dumps(entry, indent=2))
+
+#Main method to write a dataset version and record it in the catalog.
+def publish(bucket, dataset, df, version, prefix):
+    """Upload the CSV, then its manifest, then move the latest pointer if this version is newer."""
+    key = data_key(prefix, dataset, version)
+    size, digest = write_csv(df, bucket, key)
+    schema = {column: str(dtype) for column, dtype in df.dtypes.items()}
+    return record(bucket, dataset, version, key, len(df), size, digest, schema)
+
+#Function to record an already uploaded version (e.g. one streamed in batches).
+def record(bucket, dataset, version, key, rows, size, digest, schema):
+    entry = {
+        "dataset": dataset,
+        "version": version,
+        "key": key,
+        "rows": int(rows),
+        "bytes": size,
+        "schema": schema,
+        "sha256": digest,
+        "published": datetime.now(tz=timz.utc).isoformat(timespec="seconds"),
+    }
+    _put_json(bucket, manifest_key(dataset, version), entry)
+    current = _get_json(bucket, pointer_key(dataset))
+    # A backfill of an older version must not move the pointer backwards
+    if current is None or current["version"] <= version:
+        _put_json(bucket, pointer_key(dataset), entry)
+    print(f"📘 Catalog: {dataset} {version} ({entry['rows']} rows) → {key}")
+    return entry
+
+#Function to find dataset versions by listing the data prefix (outputs without manifests).
+def scan(bucket, dataset, prefix):
+    pattern = re.compile(rf"{re.escape(dataset)}_(\d{{8}})\.csv$")
+    entries = []
+    for key in list_keys(bucket, prefix):
+        match = pattern.search(key)
+        if match:
+            entries.append({"dataset": dataset, "version": match.group(1), "key": key, "source": "scan"})
+    return sorted(entries, key=lambda entry: entry["version"])
+
+#Main method to get the newest version of a dataset, or None.
+def latest(bucket, dataset, prefix=None):
+    """One GET of the pointer; falls back to scanning prefix when the dataset has no catalog yet."""
+    entry = _get_json(bucket, pointer_key(dataset))
+    if entry is not None or prefix is None:
+        return entry
+    entries = scan(bucket, dataset, prefix)
+    return entries[-1] if entries else None
+
+#Function to get the key of the newest version, or "" when there is none.
+def latest_key(bucket, dataset, prefix=None):
+    entry = latest(bucket, dataset, prefix)
+    return entry["key"] if entry else ""
+
+#Main method to list the versions of a dataset between two dates (YYYYMMDD, inclusive).
+def versions(bucket, dataset, start=None, end=None, prefix=None):
+    """Read the manifests in [start, end]; scan prefix instead if the dataset has no catalog yet."""
+    versions_prefix = f"{CATALOG_PREFIX}{dataset}/versions/"
+    last = manifest_key(dataset, end) if end else None
+    paginator = get_client().get_paginator("list_objects_v2")
+    pages = paginator.paginate(Bucket=bucket, Prefix=versions_prefix,
+                               StartAfter=f"{versions_prefix}{start}" if start else "")
+    keys = []
+    for page in pages:
+        keys += [obj["Key"] for obj in page.get("Contents", [])]
+        # Keys come back sorted, so stop paging once past the end of the range
+        if last and keys and keys[-1] > last:
+            break
+    if not keys and prefix is not None and _get_json(bucket, pointer_key(dataset)) is None:
+        return [entry for entry in scan(bucket, dataset, prefix)
+                if (not start or entry["version"] >= start) and (not end or entry["version"] <= end)]
+    return [_get_json(bucket, key) for key in keys if not last or key <= last]
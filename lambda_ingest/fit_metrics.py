@@ -0,0 +1,112 @@
+#File to instrument model fits in the forecast stage.
+#Records wall time, optimizer iterations, convergence and exceptions for every
+#(series, model) fit plus the winning model, then emits a per-model summary as a
+#CloudWatch Embedded Metric Format (EMF) log line and the full detail as a CSV.
+import io
+import json
+import time
+import pandas as pd
+
+# Metrics config
+METRICS_NAMESPACE = "VaccDiseaseMLOps/Forecast"
+METRICS_PREFIX = "logs/forecast/"
+TOP_COUNTRIES = 10
+
+#Function to pull iterations and convergence out of a fitted model.
+def fit_diagnostics(fit):
+    """Support statsmodels MLE retvals and scipy OptimizeResult retvals (both dict-like)."""
+    retvals = getattr(fit, "mle_retvals", None)
+    if retvals is None:
+        return None, None
+    if "iterations" in retvals:
+        return retvals.get("iterations"), retvals.get("converged")
+    return retvals.get("nit"), retvals.get("success")
+
+class FitMetrics:
+    """Collects one record per (series, model) fit during a forecast run."""
+
+    def __init__(self):
+        self.fits = []
+        self.winners = {}
+        self.cached = 0
+
+    def record(self, sid, model, started, fit=None, error=None, iterations=None, converged=None):
+        if fit is not None and iterations is None:
+            iterations, converged = fit_diagnostics(fit)
+        country, disease = sid.split("|", 1)
+        self.fits.append({
+            "country": country,
+            "disease": disease,
+            "model": model,
+            "wall_ms": (time.perf_counter() - started) * 1000,
+            "iterations": iterations,
+            "converged": None if converged is None else bool(converged),
+            "error": None if error is None else f"{type(error).__name__}: {error}"
+        })
+
+    def win(self, sid, model):
+        self.winners[sid] = model
+
+    def detail(self):
+        df = pd.DataFrame(self.fits, columns=["country", "disease", "model", "wall_ms",
+                                              "iterations", "converged", "error"])
+        df["winner"] = [self.winners.get(f"{c}|{d}") == m
+                        for c, d, m in zip(df["country"], df["disease"], df["model"])]
+        return df
+
+    def summary(self):
+        """Per-model totals plus the countries that took the most fit time."""
+        df = self.detail()
+        models = {}
+        for model, group in df.groupby("model"):
+            models[model] = {
+                "FitCount": int(len(group)),
+                "FitFailures": int(group["error"].notna().sum()),
+                "NotConverged": int((group["converged"] == False).sum()),
+                "FitTimeMs": float(group["wall_ms"].sum()),
+                "Iterations": float(group["iterations"].dropna().sum()),
+                "Wins": int(group["winner"].sum())
+            }
+        # astype: with no fits (all series cached) the empty column is object dtype
+        top = df.groupby("country")["wall_ms"].sum().astype(float).nlargest(TOP_COUNTRIES)
+        errors = df["error"].dropna().str.split(":").str[0].value_counts()
+        return {"models": models, "top_countries_ms": top.round(1).to_dict(),
+                "errors": errors.to_dict(), "cached_series": self.cached}
+
+    def emf_lines(self, shard_index=0, shard_count=1):
+        """One EMF JSON document per model, dimensioned by Model."""
+        summary = self.summary()
+        lines = []
+        units = {"FitCount": "Count", "FitFailures": "Count", "NotConverged": "Count",
+                 "FitTimeMs": "Milliseconds", "Iterations": "Count", "Wins": "Count"}
+        for model, values in summary["models"].items():
+            doc = {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [{
+                        "Namespace": METRICS_NAMESPACE,
+                        "Dimensions": [["Model"]],
+                        "Metrics": [{"Name": name, "Unit": units[name]} for name in values]
+                    }]
+                },
+                "Model": model,
+                "Shard": f"{shard_index}/{shard_count}",
+                "TopCountriesMs": summary["top_countries_ms"],
+                "Errors": summary["errors"],
+                "CachedSeries": summary["cached_series"]
+            }
+            doc.update(values)
+            lines.append(json.dumps(doc))
+        return lines
+
+    def emit(self, s3, bucket, run_date, shard_index=0, shard_count=1):
+        """Print EMF lines (picked up by CloudWatch Logs) and upload the detail CSV."""
+        for line in self.emf_lines(shard_index, shard_count):
+            print(line)
+        key = (f"{METRICS_PREFIX}fit_metrics_{run_date}_shard-{shard_index:04d}-of-{shard_count:04d}"
+               f"_{int(time.time())}.csv")
+        buffer = io.StringIO()
+        self.detail().to_csv(buffer, index=False)
+        s3.put_object(Bucket=bucket, Key=key, Body=buffer.getvalue())
+        print(f"📘 Fit metrics uploaded to S3 → {key}")
+        return key
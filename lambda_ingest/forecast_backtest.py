@@ -0,0 +1,105 @@
+#File to score forecast models out-of-sample with rolling-origin backtesting.
+#Each model is fitted once on the training window and then rolled forward one
+#observation at a time, reusing its fitted state instead of refitting from scratch.
+import time
+import numpy as np
+
+# Backtest config
+BACKTEST_FOLDS = 3
+MIN_TRAIN_POINTS = 4
+SARIMAX_REFIT = False
+XGB_WARM_TREES = 10
+
+#Function to get the number of folds a series can support.
+def fold_count(y, folds=BACKTEST_FOLDS):
+    """Return how many one-step holdout origins fit after the minimum training window."""
+    return max(0, min(folds, len(y) - MIN_TRAIN_POINTS))
+
+#ARIMA: fit once, then append each holdout point to the fitted state.
+def backtest_arima(y, folds, refit=SARIMAX_REFIT):
+    from statsmodels.tsa.statespace.sarimax import SARIMAX
+    start = len(y) - folds
+    res = SARIMAX(y[:start], order=(1, 1, 1), seasonal_order=(0, 0, 0, 0)).fit(disp=False)
+    preds = []
+    for k in range(start, len(y)):
+        preds.append(res.forecast(steps=1)[0])
+        if k < len(y) - 1:
+            # refit=True warm starts from the previous fold's params
+            res = res.append(y[k:k + 1], refit=refit, fit_kwargs={"disp": False} if refit else None)
+    return np.array(preds)
+
+#ETS: fit once, then roll level and trend forward with the fitted smoothing params.
+def backtest_ets(y, folds):
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+    start = len(y) - folds
+    ets = ExponentialSmoothing(y[:start], trend='add', seasonal=None).fit()
+    alpha = ets.params["smoothing_level"]
+    beta = ets.params["smoothing_trend"]
+    level, trend = ets.level[-1], ets.trend[-1]
+    preds = []
+    for k in range(start, len(y)):
+        preds.append(level + trend)
+        prev_level = level
+        level = alpha * y[k] + (1 - alpha) * (level + trend)
+        trend = beta * (level - prev_level) + (1 - beta) * trend
+    return np.array(preds)
+
+#Linear Regression: keep running sums so each fold is a closed-form update.
+def backtest_linear(x, y, folds):
+    start = len(y) - folds
+    x = x.astype(float)
+    n = start
+    sx, sy = x[:start].sum(), y[:start].sum()
+    sxx, sxy = (x[:start] ** 2).sum(), (x[:start] * y[:start]).sum()
+    preds = []
+    for k in range(start, len(y)):
+        denom = n * sxx - sx ** 2
+        slope = (n * sxy - sx * sy) / denom if denom else 0.0
+        intercept = (sy - slope * sx) / n
+        preds.append(intercept + slope * x[k])
+        n += 1
+        sx, sy = sx + x[k], sy + y[k]
+        sxx, sxy = sxx + x[k] ** 2, sxy + x[k] * y[k]
+    return np.array(preds)
+
+#XGBoost: fit once, then add a few trees per fold on top of the previous booster.
+def backtest_xgb(X, y, folds):
+    from xgboost import XGBRegressor
+    start = len(y) - folds
+    xgb = XGBRegressor(n_estimators=100)
+    xgb.fit(X[:start], y[:start])
+    preds = []
+    for k in range(start, len(y)):
+        preds.append(xgb.predict(X[k:k + 1])[0])
+        if k < len(y) - 1:
+            warm = XGBRegressor(n_estimators=XGB_WARM_TREES)
+            warm.fit(X[:k + 1], y[:k + 1], xgb_model=xgb.get_booster())
+            xgb = warm
+    return np.array(preds)
+
+#Main method to backtest every model on one series.
+def run_backtest(X, y, folds=BACKTEST_FOLDS, models=None):
+    """Return holdout MAPE per model and the seconds each backtest took."""
+    from sklearn.metrics import mean_absolute_percentage_error as mape
+    scores = {}
+    cost = {}
+    folds = fold_count(y, folds)
+    if folds == 0:
+        return scores, cost
+    runners = {
+        "ARIMA": lambda: backtest_arima(y, folds),
+        "ETS": lambda: backtest_ets(y, folds),
+        "LinearRegression": lambda: backtest_linear(X.flatten(), y, folds),
+        "XGBoost": lambda: backtest_xgb(X, y, folds),
+    }
+    for name, runner in runners.items():
+        if models is not None and name not in models:
+            continue
+        started = time.perf_counter()
+        try:
+            preds = runner()
+            scores[name] = mape(y[-folds:], preds)
+        except Exception:
+            pass
+        cost[name] = time.perf_counter() - started
+    return scores, cost
@@ -0,0 +1,109 @@
+#File to cache forecast results between runs.
+#Entries are keyed by a hash of the series' (year, value) data plus the model
+#configuration, so a series is only refitted when its data or the config changes.
+import hashlib
+import json
+import time
+import numpy as np
+
+# Cache config
+CACHE_KEY = "cache/forecast/forecast_cache.json"
+CACHE_MAX_ENTRIES = 50000
+CACHE_VERSION = 1
+
+#Function to hash one series together with the model configuration.
+def series_digest(ts, config):
+    """Return a stable content hash for a (year, value) series and model config."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(config, sort_keys=True).encode("utf-8"))
+    digest.update(np.ascontiguousarray(ts[["year", "value"]].to_numpy(dtype="float64")).tobytes())
+    return digest.hexdigest()
+
+class ForecastCache:
+    """Size-bounded forecast cache stored as one JSON object on S3."""
+
+    def __init__(self, s3, bucket, key=CACHE_KEY, max_entries=CACHE_MAX_ENTRIES):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.max_entries = max_entries
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.touched = set()
+        self.run_stamp = int(time.time())
+
+    def load(self):
+        """Read the cache from S3; start empty if missing or from another version."""
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self.key)
+            payload = json.loads(obj["Body"].read())
+            if payload.get("version") == CACHE_VERSION:
+                self.entries = payload.get("entries", {})
+        except Exception:
+            print("ℹ️ No forecast cache found — starting empty.")
+            self.entries = {}
+        return self
+
+    def get(self, digest):
+        entry = self.entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        entry["last_used"] = self.run_stamp
+        self.touched.add(digest)
+        return {k: v for k, v in entry.items() if k != "last_used"}
+
+    def put(self, digest, result):
+        self.entries[digest] = {
+            "model": result["model"],
+            "score": result["score"],
+            "years": result["years"],
+            "forecast": result["forecast"],
+            "last_used": self.run_stamp
+        }
+        self.touched.add(digest)
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_entries."""
+        overflow = len(self.entries) - self.max_entries
+        if overflow <= 0:
+            return 0
+        stale = sorted(self.entries, key=lambda d: self.entries[d]["last_used"])[:overflow]
+        for digest in stale:
+            del self.entries[digest]
+        self.evicted += len(stale)
+        return len(stale)
+
+    def save(self):
+        self.evict()
+        body = json.dumps({"version": CACHE_VERSION, "entries": self.entries})
+        self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=body)
+
+    def partial_key(self, shard_index):
+        return self.key.replace(".json", f"_shard_{shard_index:04d}.json")
+
+    def save_partial(self, shard_index):
+        """Write only the entries this shard used, for the reducer to merge."""
+        entries = {d: self.entries[d] for d in self.touched}
+        # Keep what earlier invocations of this shard already wrote (resumed runs)
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self.partial_key(shard_index))
+            entries = dict(json.loads(obj["Body"].read()).get("entries", {}), **entries)
+        except Exception:
+            pass
+        body = json.dumps({"version": CACHE_VERSION, "entries": entries})
+        self.s3.put_object(Bucket=self.bucket, Key=self.partial_key(shard_index), Body=body)
+
+    def merge_partials(self, shard_count):
+        """Fold every shard's partial cache into this cache and delete the partials."""
+        for shard_index in range(shard_count):
+            key = self.partial_key(shard_index)
+            try:
+                obj = self.s3.get_object(Bucket=self.bucket, Key=key)
+            except Exception:
+                continue
+            self.entries.update(json.loads(obj["Body"].read()).get("entries", {}))
+            self.s3.delete_object(Bucket=self.bucket, Key=key)
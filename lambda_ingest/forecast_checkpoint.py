@@ -0,0 +1,58 @@
+#File to checkpoint forecast progress so a Lambda timeout becomes progress.
+#A checkpoint holds the results of completed series and a cursor into the ordered
+#series list; the next invocation for the same input, date and shard resumes from it
+#(the paused invocation returns its run_date for that).
+import json
+import time
+
+# Checkpoint config
+CHECKPOINT_PREFIX = "checkpoints/forecast/"
+SAFETY_MARGIN_MS = 30000
+CHECKPOINT_EVERY_S = 120
+
+#Function to read the remaining invocation time; None when running locally.
+def time_left_ms(context):
+    if context is None or not hasattr(context, "get_remaining_time_in_millis"):
+        return None
+    return context.get_remaining_time_in_millis()
+
+class Checkpoint:
+    """Results and cursor of one forecast run (date + shard) stored as JSON on S3."""
+
+    def __init__(self, s3, bucket, run_date, shard_index=0, shard_count=1):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = f"{CHECKPOINT_PREFIX}{run_date}/shard-{shard_index:04d}-of-{shard_count:04d}.json"
+        self.last_saved = time.monotonic()
+
+    def load(self, input_key):
+        """Return (cursor, results) to resume from, or (0, []) if nothing matches this input."""
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self.key)
+            state = json.loads(obj["Body"].read())
+        except Exception:
+            return 0, []
+        if state.get("input_key") != input_key:
+            print(f"ℹ️ Ignoring checkpoint for another input: {state.get('input_key')}")
+            return 0, []
+        print(f"⏯️ Resuming from checkpoint at series {state['cursor']} ({len(state['results'])} rows)")
+        return state["cursor"], state["results"]
+
+    def due(self, context, margin_ms=SAFETY_MARGIN_MS):
+        """Return 'deadline' when time is almost up, 'periodic' when a save is due, else None."""
+        left = time_left_ms(context)
+        if left is not None and left < margin_ms:
+            return "deadline"
+        if time.monotonic() - self.last_saved > CHECKPOINT_EVERY_S:
+            return "periodic"
+        return None
+
+    def save(self, input_key, cursor, results):
+        body = json.dumps({"input_key": input_key, "cursor": cursor, "results": results,
+                           "saved": int(time.time())})
+        self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=body)
+        self.last_saved = time.monotonic()
+        print(f"💾 Checkpoint saved at series {cursor} → {self.key}")
+
+    def clear(self):
+        self.s3.delete_object(Bucket=self.bucket, Key=self.key)
@@ -0,0 +1,201 @@
+#File to answer forecast and anomaly lookups from in-memory indexes.
+#The latest forecast (forecasted_data) and anomaly (grouped_combined_data) outputs are
+#loaded once, sorted and indexed by series key, so a query is a dict lookup plus a
+#bisect on the years of one series. Decoded results are kept in an LRU, and the
+#indexes are reloaded when the catalog points at a new version.
+#Library:  ForecastQuery().forecast("USA", "Measles", year=2026)
+#HTTP:     python lambda_ingest/forecast_query.py [--port 8080]
+#          GET /forecast?country=USA&disease=Measles[&year=2026 | &start=2025&end=2027]
+#          GET /anomalies?country=United States&disease=Measles[&type=Disease][&flagged=1]
+#          GET /health
+import argparse
+import bisect
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from schemas import read_dataset
+from dataset_catalog import latest
+
+# Query config
+S3_BUCKET = "vacc-disease-mlops-pipeline-argh"
+# Catalog dataset, fallback prefix and series key of every indexed output
+DATASETS = {
+    "forecast": ("forecasted_data", "processed/forecast/", ["country", "disease"]),
+    "anomalies": ("grouped_combined_data", "aggregated/forecasting/", ["country_name", "disease_name", "type"]),
+}
+# Series types as the EDA stage writes them (title-cased)
+TYPES = ["Vaccination", "Disease"]
+REFRESH_EVERY_S = 60
+LRU_SIZE = 4096
+
+class SeriesIndex:
+    """Rows of one output sorted by series key and year, with the row range of every series."""
+
+    def __init__(self, df, keys, year="year"):
+        df = df.sort_values(keys + [year], kind="stable").reset_index(drop=True)
+        self.columns = list(df.columns)
+        # Plain lists decode a row without pandas; NaN becomes None so rows are valid JSON
+        self.values = {column: [None if isinstance(v, float) and math.isnan(v) else v
+                                for v in df[column].tolist()] for column in self.columns}
+        self.years = [int(y) for y in df[year].tolist()]
+        self.ranges = {}
+        for i, key in enumerate(zip(*(self.values[k] for k in keys))):
+            if key in self.ranges:
+                self.ranges[key][1] = i + 1
+            else:
+                self.ranges[key] = [i, i + 1]
+        self.rows = len(df)
+
+    def row(self, i):
+        return {column: self.values[column][i] for column in self.columns}
+
+    def lookup(self, key, start=None, end=None):
+        """Rows of one series with start <= year <= end (both optional)."""
+        if key not in self.ranges:
+            return []
+        lo, hi = self.ranges[key]
+        if start is not None:
+            lo = bisect.bisect_left(self.years, start, lo, hi)
+        if end is not None:
+            hi = bisect.bisect_right(self.years, end, lo, hi)
+        return [self.row(i) for i in range(lo, hi)]
+
+class ForecastQuery:
+    """Point and range queries over the latest forecast and anomaly outputs."""
+
+    def __init__(self, bucket=S3_BUCKET, refresh_every_s=REFRESH_EVERY_S, cache_size=LRU_SIZE):
+        self.bucket = bucket
+        self.refresh_every_s = refresh_every_s
+        self.cache_size = cache_size
+        self.indexes = {}
+        self.versions = {}
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.checked = 0.0
+        self.lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """Reload any output whose catalog version changed; checks at most every refresh_every_s."""
+        now = time.monotonic()
+        if not force and now - self.checked < self.refresh_every_s:
+            return False
+        with self.lock:
+            self.checked = now
+            changed = False
+            for name, (dataset, prefix, keys) in DATASETS.items():
+                entry = latest(self.bucket, dataset, prefix)
+                if entry is None:
+                    continue
+                version = entry.get("sha256") or entry["key"]
+                if self.versions.get(name) == version:
+                    continue
+                self.indexes[name] = SeriesIndex(read_dataset(self.bucket, entry["key"], dataset), keys)
+                self.versions[name] = version
+                print(f"🔄 Indexed {name}: {self.indexes[name].rows} rows from {entry['key']}")
+                changed = True
+            if changed:
+                self.cache.clear()
+            return changed
+
+    def _query(self, name, key, start, end, flagged=False):
+        self.refresh()
+        cache_key = (name, key, start, end, flagged)
+        with self.lock:
+            if cache_key in self.cache:
+                self.cache.move_to_end(cache_key)
+                self.hits += 1
+                return self.cache[cache_key]
+            self.misses += 1
+        index = self.indexes.get(name)
+        rows = index.lookup(key, start, end) if index else []
+        if flagged:
+            rows = [row for row in rows if row.get("anomaly")]
+        with self.lock:
+            self.cache[cache_key] = rows
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return rows
+
+    def forecast(self, country, disease, year=None, start=None, end=None):
+        """Forecast rows of one series: one year, a year range, or the whole horizon."""
+        if year is not None:
+            start = end = year
+        return self._query("forecast", (country, disease), start, end)
+
+    def anomalies(self, country, disease, type=None, year=None, start=None, end=None, flagged=False):
+        """Aggregated rows (with change_pct/anomaly) of one country and disease, optionally one type
+        (any casing: "disease" finds the stored "Disease")."""
+        if year is not None:
+            start = end = year
+        types = [type.title()] if type else TYPES
+        rows = []
+        for series_type in types:
+            rows += self._query("anomalies", (country, disease, series_type), start, end, flagged)
+        return rows
+
+    def stats(self):
+        return {
+            "versions": dict(self.versions),
+            "rows": {name: index.rows for name, index in self.indexes.items()},
+            "series": {name: len(index.ranges) for name, index in self.indexes.items()},
+            "cache": {"size": len(self.cache), "hits": self.hits, "misses": self.misses},
+        }
+
+#Function to answer one HTTP-style request; returns (status, body).
+def handle(query, path, params):
+    def number(name):
+        return int(params[name]) if params.get(name) else None
+
+    try:
+        if path == "/health":
+            query.refresh()
+            return 200, query.stats()
+        if path not in ("/forecast", "/anomalies"):
+            return 404, {"error": f"unknown path {path}"}
+        if not params.get("country") or not params.get("disease"):
+            return 400, {"error": "country and disease are required"}
+        ranges = {"year": number("year"), "start": number("start"), "end": number("end")}
+        if path == "/forecast":
+            rows = query.forecast(params["country"], params["disease"], **ranges)
+        else:
+            rows = query.anomalies(params["country"], params["disease"], type=params.get("type"),
+                                   flagged=params.get("flagged") in ("1", "true"), **ranges)
+    except ValueError as e:
+        return 400, {"error": str(e)}
+    return (200 if rows else 404), {"rows": rows}
+
+class QueryHandler(BaseHTTPRequestHandler):
+    query = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        status, body = handle(self.query, url.path, params)
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+#Main method to serve queries over HTTP on localhost.
+def serve(port=8080, query=None):
+    QueryHandler.query = query or ForecastQuery()
+    QueryHandler.query.refresh(force=True)
+    server = ThreadingHTTPServer(("127.0.0.1", port), QueryHandler)
+    print(f"🚀 Forecast query API on http://127.0.0.1:{port}")
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve forecast and anomaly lookups over HTTP.")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    serve(args.port).serve_forever()
@@ -0,0 +1,46 @@
+#File to split the forecast stage across several invocations (fan-out/fan-in).
+#Every series is assigned to a shard by a stable hash of its id; each shard writes
+#a partial output and a reducer merges the partials into one forecast file.
+import zlib
+import pandas as pd
+
+# Sharding config
+PARTIAL_PREFIX = "processed/forecast/partials/"
+
+#Function to get the shard a series belongs to.
+def shard_of(sid, shard_count):
+    """Stable across processes and runs, unlike the builtin hash()."""
+    return zlib.crc32(sid.encode("utf-8")) % shard_count
+
+#Function to build the S3 key of one shard's partial output.
+def partial_key(run_date, shard_index, shard_count):
+    return f"{PARTIAL_PREFIX}{run_date}/part-{shard_index:04d}-of-{shard_count:04d}.csv"
+
+#Function to list the partial outputs written for a run.
+def list_partials(s3, bucket, run_date, shard_count):
+    keys = []
+    paginator = s3.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=f"{PARTIAL_PREFIX}{run_date}/"):
+        keys += [obj["Key"] for obj in page.get("Contents", [])
+                 if obj["Key"].endswith(f"-of-{shard_count:04d}.csv")]
+    return sorted(keys)
+
+#Main method to merge all partial outputs of a run.
+def merge_partials(s3, bucket, run_date, shard_count, sort_by):
+    """Return the merged DataFrame and the partial keys, or (None, keys) if shards are missing."""
+    keys = list_partials(s3, bucket, run_date, shard_count)
+    if len(keys) != shard_count:
+        return None, keys
+    dfs = []
+    for key in keys:
+        obj = s3.get_object(Bucket=bucket, Key=key)
+        dfs.append(pd.read_csv(obj["Body"]))
+    merged = pd.concat(dfs, ignore_index=True).sort_values(sort_by, kind="stable")
+    return merged.reset_index(drop=True), keys
+
+#Function to remove partial objects once they have been merged.
+def delete_partials(s3, bucket, keys):
+    for start in range(0, len(keys), 1000):
+        batch = [{"Key": key} for key in keys[start:start + 1000]]
+        if batch:
+            s3.delete_objects(Bucket=bucket, Delete={"Objects": batch})
@@ -0,0 +1,132 @@
+#File to forecast every disease series with one global gradient-boosted model.
+#Instead of one XGBRegressor per series on a single year feature, one model is
+#trained across all series on lagged values (own disease lags and the vaccination
+#coverage lags of the same country/disease) plus categorical country/disease codes,
+#and all 5-year horizons are predicted in one batched recursive pass.
+import time
+import numpy as np
+import pandas as pd
+
+# Global model config
+VALUE_LAGS = 3
+COVERAGE_LAGS = 2
+HORIZON = 5
+MIN_POINTS = 5
+XGB_PARAMS = {"n_estimators": 300, "max_depth": 4, "learning_rate": 0.05,
+              "tree_method": "hist", "enable_categorical": True}
+
+#Function to build the per-series frame with scaled values and coverage.
+def prepare_series(df):
+    """Return disease series with their vaccination coverage aligned by year."""
+    keys = ["country", "disease_name"]
+    dis = df[df["type"] == "Disease"].dropna(subset=["year", "value"])
+    dis = dis.groupby(keys + ["year"], as_index=False, observed=True)["value"].mean()
+    vac = df[df["type"] == "Vaccination"].dropna(subset=["year", "value"])
+    vac = vac.groupby(keys + ["year"], as_index=False, observed=True)["value"].mean()
+    vac = vac.rename(columns={"value": "coverage"})
+    series = dis.merge(vac, on=keys + ["year"], how="left").sort_values(keys + ["year"])
+    series = series[series.groupby(keys, observed=True)["year"].transform("size") >= MIN_POINTS]
+    # Carry the last known coverage forward inside each series
+    series["coverage"] = series.groupby(keys, observed=True)["coverage"].ffill()
+    # Scale each series by its mean so large and small countries share one model
+    series["scale"] = series.groupby(keys, observed=True)["value"].transform(lambda v: v.abs().mean()) + 1e-9
+    series["y"] = series["value"] / series["scale"]
+    return series.reset_index(drop=True)
+
+#Function to add lag features computed within each series.
+def add_lags(series):
+    grouped = series.groupby(["country", "disease_name"], observed=True)
+    for lag in range(1, VALUE_LAGS + 1):
+        series[f"lag_{lag}"] = grouped["y"].shift(lag)
+    for lag in range(1, COVERAGE_LAGS + 1):
+        series[f"coverage_lag_{lag}"] = grouped["coverage"].shift(lag)
+    return series
+
+#Function to list the model feature columns.
+def feature_columns():
+    return ([f"lag_{lag}" for lag in range(1, VALUE_LAGS + 1)]
+            + [f"coverage_lag_{lag}" for lag in range(1, COVERAGE_LAGS + 1)]
+            + ["country_code", "disease_code"])
+
+#Function to encode country and disease as categoricals with fixed categories.
+def encode(frame, countries, diseases):
+    frame["country_code"] = pd.Categorical(frame["country"], categories=countries)
+    frame["disease_code"] = pd.Categorical(frame["disease_name"], categories=diseases)
+    return frame
+
+#Main method to train the global model and forecast all series.
+def global_forecast(df):
+    """Return forecast rows for every series and timing stats of the run."""
+    from xgboost import XGBRegressor
+    series = add_lags(prepare_series(df))
+    if series.empty:
+        return [], {"series": 0, "train_s": 0.0, "predict_s": 0.0}
+    countries = sorted(series["country"].unique())
+    diseases = sorted(series["disease_name"].unique())
+    series = encode(series, countries, diseases)
+    features = feature_columns()
+    train = series.dropna(subset=[f"lag_{VALUE_LAGS}"])
+
+    started = time.perf_counter()
+    model = XGBRegressor(**XGB_PARAMS)
+    model.fit(train[features], train["y"])
+    train_s = time.perf_counter() - started
+
+    # In-sample MAPE per series on the original scale (same formula as sklearn)
+    pred = model.predict(train[features]) * train["scale"]
+    ape = (pred - train["value"]).abs() / train["value"].abs().clip(lower=np.finfo(np.float64).eps)
+    scores = ape.groupby([train["country"], train["disease_name"]], observed=True).mean()
+
+    # Batched recursive forecast: one predict call per horizon step for all series
+    started = time.perf_counter()
+    keys = ["country", "disease_name"]
+    tail = series.groupby(keys, observed=True).tail(max(VALUE_LAGS, COVERAGE_LAGS)).copy()
+    tail["pos"] = tail.groupby(keys, observed=True).cumcount(ascending=False) + 1
+    # Only the series that exist: WHO data is ragged, not every country reports every disease
+    state = series.groupby(keys, observed=True)[["year", "scale"]].last()
+    tail = tail.set_index(keys + ["pos"])
+    lags = tail["y"].unstack("pos").reindex(index=state.index, columns=range(1, VALUE_LAGS + 1)).to_numpy()
+    cover = tail["coverage"].unstack("pos").reindex(index=state.index, columns=range(1, COVERAGE_LAGS + 1))
+    cover = cover.to_numpy()
+    state = state.reset_index()
+    step_rows = []
+    for step in range(HORIZON):
+        X = pd.DataFrame(lags, columns=[f"lag_{lag}" for lag in range(1, VALUE_LAGS + 1)])
+        for lag in range(1, COVERAGE_LAGS + 1):
+            X[f"coverage_lag_{lag}"] = cover[:, lag - 1]
+        X["country"] = state["country"].to_numpy()
+        X["disease_name"] = state["disease_name"].to_numpy()
+        X = encode(X, countries, diseases)
+        pred = model.predict(X[features])
+        step_rows.append(pred)
+        # Shift lags; future coverage is unknown so the last known value is carried
+        lags = np.column_stack([pred, lags[:, :VALUE_LAGS - 1]])
+        cover = np.column_stack([cover[:, 0], cover[:, :COVERAGE_LAGS - 1]])
+    predict_s = time.perf_counter() - started
+
+    results = []
+    preds = np.column_stack(step_rows) * state["scale"].to_numpy()[:, None]
+    for i, (country, disease, year) in enumerate(zip(state["country"], state["disease_name"], state["year"])):
+        score = float(scores.get((country, disease), np.nan))
+        for step in range(HORIZON):
+            results.append({
+                "country": country,
+                "disease": disease,
+                "year": int(year) + step + 1,
+                "forecast": float(preds[i, step]),
+                "model": "GlobalXGBoost",
+                "score": score
+            })
+    stats = {"series": len(state), "train_rows": len(train), "train_s": train_s, "predict_s": predict_s}
+    return results, stats
+
+#Function to time the per-series XGBoost loop on the same series, for comparison.
+def time_per_series_xgb(df):
+    from xgboost import XGBRegressor
+    series = prepare_series(df)
+    started = time.perf_counter()
+    fits = 0
+    for _, group in series.groupby(["country", "disease_name"], observed=True):
+        XGBRegressor(n_estimators=100).fit(group[["year"]].to_numpy(), group["value"].to_numpy())
+        fits += 1
+    return {"fits": fits, "train_s": time.perf_counter() - started}
@@ -0,0 +1,17 @@
+#File with the WHO GHO indicators the pipeline ingests, shared by the ingestion and validation stages.
+
+# Vaccination indicators (WHO API codes)
+VACCINE_INDICATORS = {
+    "diphtheria": "WHS4_100",
+    "measles": "WHS8_110",
+    "polio": "WHS4_544",
+    "hepatitis_b": "WHS4_117"
+}
+
+# Disease indicators (reported cases or incidence)
+DISEASE_INDICATORS = {
+    "measles": "WHS3_62",
+    "diphtheria": "WHS3_41",
+    "polio": "WHS3_49",
+    "hepatitis_b": "HEPATITIS_HBV_INFECTIONS_NEW_NUM"
+}
@@ -1,24 +1,45 @@
-import boto3
 import pandas as pd
-import io
+import numpy as np
 import os
+import tempfile
 from datetime import datetime
 from datetime import timezone as timz
 import json
+from concurrent.futures import ThreadPoolExecutor
+from tracing import traced, traced_handler, span, peak_rss_mb, in_trace
+from s3_access import get_client, list_keys, read_csv, write_csv, read_csv_chunks, write_file
+from dataset_catalog import publish, record, data_key
+from schemas import enforce, read_dataset, get_schema, print_report, bytes_per_row, SAMPLE_ROWS
+from validation import (load_references, validate, quarantine_frame, quarantine_dataset, quarantine_key,
+                        quarantine_columns, print_counts, publish_quarantine)
 
 # S3 config
 bucket = "vacc-disease-mlops-pipeline-argh"
-s3 = boto3.client("s3")
+s3 = get_client()
+CATEGORIES = ["vaccination", "disease"]
+# Chunked mode: raw columns kept (and their cleaned names), and the memory ceiling in MB
+# for the batches in flight across all categories
+RAW_COLUMNS = {"IndicatorCode": "indicator", "SpatialDim": "country", "ParentLocation": "region",
+               "TimeDim": "year", "Value": "value"}
+CLEAN_COLUMNS = ["indicator", "country", "region", "year", "value", "disease_code"]
+MEMORY_CEILING_MB = int(os.environ.get("CLEAN_MEMORY_MB", "256"))
+# Rows read first to measure the in-memory size of a row
+PROBE_ROWS = 1000
+# A batch is alive about 4 times at once (parsed, cleaned, hashed, serialized)
+BATCH_COPIES = 4
 
+@traced()
 def list_s3_files(prefix):
-    response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix)
-    return [obj["Key"] for obj in response.get("Contents", []) if obj["Key"].endswith(".csv")]
+    return [key for key in list_keys(bucket, prefix) if key.endswith(".csv")]
 
+@traced()
 def download_csv(key):
-    obj = s3.get_object(Bucket=bucket, Key=key)
-    return pd.read_csv(io.BytesIO(obj["Body"].read()))
+    return read_csv(bucket, key)
 
-def process_category(category):
+@traced()
+def process_category(category, chunked=False, memory_mb=MEMORY_CEILING_MB):
+    if chunked:
+        return process_category_chunked(category, memory_mb)
     prefix = f"raw/{category}/"
     files = list_s3_files(prefix)
     dfs = []
@@ -43,37 +64,185 @@ def process_category(category):
         "indicator_code": "disease_code"
     })
     df_cleaned = df_cleaned[["indicator", "country", "region", "year", "value", "disease_code"]]
-    #Remove rows with null values
-    df_cleaned = df_cleaned.dropna(subset=["indicator", "year", "country", "value", "disease_code"])
+    # Type the columns once here; every later stage reads them with the same schema.
+    # Rows with nulls or that break a validation rule go to quarantine
+    dataset = f"processed_{category}"
+    df_cleaned, rejected = enforce(df_cleaned, dataset)
+    rows = len(df_cleaned)
+    df_cleaned, failing, counts = validate(df_cleaned, load_references(bucket))
+    print_counts(dataset, rows, counts)
 
     # Create timestamp
     timestamp = datetime.now(tz=timz.utc).strftime("%Y%m%d")
 
-    # 1️⃣ Upload versioned cleaned file
-    clean_key = f"processed/{category}/processed_{category}_{timestamp}.csv"
-    buffer = io.StringIO()
-    df_cleaned.to_csv(buffer, index=False)
-    s3.put_object(Bucket=bucket, Key=clean_key, Body=buffer.getvalue())
-    print(f"✅ Uploaded cleaned file → {clean_key}")
+    # 1️⃣ Upload versioned cleaned file and record it in the catalog
+    with span("write_csv"):
+        entry = publish(bucket, dataset, df_cleaned, timestamp, f"processed/{category}/")
+    print(f"✅ Uploaded cleaned file → {entry['key']}")
+    with span("write_csv"):
+        quarantined = quarantine_frame(dataset, failing, rejected)
+        quarantine = publish_quarantine(bucket, dataset, quarantined, timestamp)
+    print(f"🧪 Quarantined rows → {quarantine['key']} ({quarantine['rows']} rows)")
 
     # 2️⃣ Append to or create master dataset
     agg_key = f"aggregated/{category}/master_{category}.csv"
     try:
-        existing_df = download_csv(agg_key)
+        existing_df = read_dataset(bucket, agg_key, f"processed_{category}")
         df_combined = pd.concat([existing_df, df_cleaned]).drop_duplicates()
     except Exception:
         print(f"ℹ️ No existing {category} master file found — creating new.")
         df_combined = df_cleaned
 
-    agg_buffer = io.StringIO()
-    df_combined.to_csv(agg_buffer, index=False)
-    s3.put_object(Bucket=bucket, Key=agg_key, Body=agg_buffer.getvalue())
+    with span("write_csv"):
+        write_csv(df_combined, bucket, agg_key)
     print(f"✅ Master dataset updated → {agg_key}")
+    return entry
 
+#Function to pick the batch size that keeps the batches in flight under the ceiling.
+def batch_rows(bytes_per_row, memory_mb):
+    return max(PROBE_ROWS, int(memory_mb * 1024 * 1024 / (BATCH_COPIES * bytes_per_row)))
+
+#Function to yield batches from a CSV reader, sized for the memory ceiling after a probe batch.
+def iter_batches(reader, memory_mb):
+    with reader:
+        try:
+            batch = reader.get_chunk(PROBE_ROWS)
+        except StopIteration:
+            return
+        rows = batch_rows(max(1, batch.memory_usage(deep=True).sum() / max(1, len(batch))), memory_mb)
+        while True:
+            yield batch
+            try:
+                batch = reader.get_chunk(rows)
+            except StopIteration:
+                return
+
+#Function to clean one batch of raw rows; returns (valid typed rows, quarantined rows, {rule id: failing rows}).
+def clean_batch(df, disease_code, dataset, references):
+    df = df.rename(columns=RAW_COLUMNS)
+    df["disease_code"] = disease_code
+    for column in CLEAN_COLUMNS:
+        if column not in df.columns:
+            df[column] = None
+    typed, rejected = enforce(df[CLEAN_COLUMNS], dataset, report=False)
+    valid, failing, counts = validate(typed, references)
+    return valid, quarantine_frame(dataset, failing, rejected), counts
+
+#Function to keep the rows not seen before (in this batch or earlier ones), like drop_duplicates.
+def unseen_rows(df, seen):
+    """seen is the sorted array of 64-bit row hashes written so far (8 bytes per master row)."""
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    keep = np.zeros(len(hashes), dtype=bool)
+    keep[np.unique(hashes, return_index=True)[1]] = True
+    if len(seen):
+        # searchsorted keeps the temporaries batch-sized, unlike np.isin
+        pos = np.minimum(np.searchsorted(seen, hashes), len(seen) - 1)
+        keep &= seen[pos] != hashes
+    seen = np.concatenate([seen, hashes[keep]])
+    seen.sort()
+    return df[keep], seen
+
+#Main method to clean one category in bounded row batches.
+@traced()
+def process_category_chunked(category, memory_mb=MEMORY_CEILING_MB):
+    """Same outputs as process_category; batches stream through temp files, never the full history."""
+    start_rss = peak_rss_mb()
+    files = list_s3_files(f"raw/{category}/")
+    if not files:
+        print(f"❌ No files found for {category}")
+        return
+    timestamp = datetime.now(tz=timz.utc).strftime("%Y%m%d")
+    dataset = f"processed_{category}"
+    clean_key = data_key(f"processed/{category}/", dataset, timestamp)
+    agg_key = f"aggregated/{category}/master_{category}.csv"
+    references = load_references(bucket)
+    rows = batches = raw_rows = typed_rows = quarantined_rows = 0
+    raw_bytes = typed_bytes = 0.0
+    rejected = {}
+    failures = {}
+    sample = None
+    with tempfile.TemporaryFile() as cleaned, tempfile.TemporaryFile() as master, \
+            tempfile.TemporaryFile() as quarantined:
+        # 1️⃣ Clean every raw object batch by batch into the processed file
+        for key in files:
+            disease_code = os.path.basename(key).split("_")[0]
+            reader = read_csv_chunks(bucket, key, dtype=str, usecols=lambda column: column in RAW_COLUMNS)
+            for batch in iter_batches(reader, memory_mb):
+                raw_rows += len(batch)
+                raw_bytes += bytes_per_row(batch) * len(batch)
+                batch, bad, counts = clean_batch(batch, disease_code, dataset, references)
+                typed_bytes += bytes_per_row(batch) * len(batch)
+                schema_bad = bad[bad["rules"] == "schema"]
+                typed_rows += len(batch) + len(bad) - len(schema_bad)
+                for reason, count in schema_bad["reason"].value_counts().items():
+                    rejected[reason] = rejected.get(reason, 0) + count
+                for rule_id, count in counts.items():
+                    failures[rule_id] = failures.get(rule_id, 0) + count
+                if sample is None and len(schema_bad):
+                    sample = schema_bad.head(SAMPLE_ROWS)
+                if len(bad):
+                    bad.to_csv(quarantined, header=quarantined.tell() == 0, index=False, encoding="utf-8")
+                    quarantined_rows += len(bad)
+                batch.to_csv(cleaned, header=cleaned.tell() == 0, index=False, encoding="utf-8")
+                rows += len(batch)
+                batches += 1
+        if cleaned.tell() == 0:
+            pd.DataFrame(columns=CLEAN_COLUMNS).to_csv(cleaned, index=False, encoding="utf-8")
+        cleaned.seek(0)
+        with span("write_csv"):
+            size, digest = write_file(cleaned, bucket, clean_key)
+        print_report(dataset, raw_rows, raw_bytes / max(1, raw_rows), typed_bytes / max(1, rows),
+                     rejected, sample)
+        print_counts(dataset, typed_rows, failures)
+        entry = record(bucket, dataset, timestamp, clean_key, rows, size, digest,
+                       get_schema(dataset)["columns"])
+        print(f"✅ Uploaded cleaned file → {clean_key} ({rows} rows in {batches} batches)")
+        if quarantined.tell() == 0:
+            pd.DataFrame(columns=quarantine_columns(dataset)).to_csv(quarantined, index=False, encoding="utf-8")
+        quarantined.seek(0)
+        with span("write_csv"):
+            size, digest = write_file(quarantined, bucket, quarantine_key(dataset, timestamp))
+        record(bucket, quarantine_dataset(dataset), timestamp, quarantine_key(dataset, timestamp),
+               quarantined_rows, size, digest, {column: "object" for column in quarantine_columns(dataset)})
+        print(f"🧪 Quarantined rows → {quarantine_key(dataset, timestamp)} ({quarantined_rows} rows)")
+
+        # 2️⃣ Stream the existing master, then the new rows it does not have yet
+        seen = np.array([], dtype=np.uint64)
+        master_rows = 0
+        try:
+            readers = [read_csv_chunks(bucket, agg_key, dtype=str)]
+        except s3.exceptions.NoSuchKey:
+            print(f"ℹ️ No existing {category} master file found — creating new.")
+            readers = []
+        cleaned.seek(0)
+        readers.append(pd.read_csv(cleaned, dtype=str, iterator=True))
+        for reader in readers:
+            for batch in iter_batches(reader, memory_mb):
+                # Typed rows hash the same whichever formatting an older master used
+                batch, _ = enforce(batch, dataset, report=False)
+                batch, seen = unseen_rows(batch, seen)
+                batch.to_csv(master, header=master.tell() == 0, index=False, encoding="utf-8")
+                master_rows += len(batch)
+        master.seek(0)
+        with span("write_csv"):
+            write_file(master, bucket, agg_key)
+    print(f"✅ Master dataset updated → {agg_key} ({master_rows} rows)")
+    if start_rss is not None:
+        print(f"-> Peak RSS {peak_rss_mb():.0f} MB (+{peak_rss_mb() - start_rss:.0f} MB, ceiling {memory_mb:.0f} MB)")
+    return entry
+
+#Event keys (all optional): chunked=True to clean in bounded batches, memory_mb for
+#the memory ceiling of the batches in flight (default CLEAN_MEMORY_MB or 256).
+@traced_handler("clean")
 def lambda_handler(event=None, context=None):
+    event = event or {}
     print("🚀 Starting cleaning process...")
-    process_category("vaccination")
-    process_category("disease")
+    chunked = bool(event.get("chunked", os.environ.get("CLEAN_CHUNKED") == "1"))
+    # The categories run side by side, so each gets its share of the ceiling
+    memory_mb = int(event.get("memory_mb", MEMORY_CEILING_MB)) / len(CATEGORIES)
+    # Categories do not depend on each other, so clean them side by side
+    with ThreadPoolExecutor(max_workers=len(CATEGORIES)) as pool:
+        list(pool.map(in_trace(lambda category: process_category(category, chunked, memory_mb)), CATEGORIES))
     print("✅ Cleaning done.")
     return {
         "statusCode": 200,
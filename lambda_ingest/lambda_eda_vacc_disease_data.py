@@ -2,31 +2,33 @@
 from datetime import datetime
 from datetime import timezone as timz
 import pandas as pd
-import boto3
-import io
 import os
 import json
+from tracing import traced, traced_handler, span
+from s3_access import get_client, put_text
+from dataset_catalog import publish, latest_key
+from schemas import enforce, read_dataset
+from validation import load_references, validate, quarantine_frame, print_counts, publish_quarantine
 
 # S3 config
 BUCKET = "vacc-disease-mlops-pipeline-argh"
-s3 = boto3.client("s3")
+s3 = get_client()
 # Getting timestamp date for files.
 tmstamp = datetime.now(tz=timz.utc).strftime("%Y%m%d")
 
 #Function to load vaccination and disease data
+@traced()
 def load_vacc_disease_data():
     print ("Loading vaccination and disease data...")
     vacc_df = pd.DataFrame()
     disease_df = pd.DataFrame()
     
     try:
-        vacc_key = f"processed/vaccination/processed_vaccination_{tmstamp}.csv"
-        disease_key = f"processed/disease/processed_disease_{tmstamp}.csv"
-        vacc_obj = s3.get_object(Bucket=BUCKET, Key=vacc_key)
-        disease_obj = s3.get_object(Bucket=BUCKET, Key=disease_key)
-        vacc_df = pd.read_csv(io.BytesIO(vacc_obj["Body"].read()), low_memory=False)
+        vacc_key = latest_key(BUCKET, "processed_vaccination", "processed/vaccination/")
+        disease_key = latest_key(BUCKET, "processed_disease", "processed/disease/")
+        vacc_df = read_dataset(BUCKET, vacc_key, "processed_vaccination")
         print("-> Total vaccination records:", len(vacc_df))
-        disease_df = pd.read_csv(io.BytesIO(disease_obj["Body"].read()), low_memory=False)
+        disease_df = read_dataset(BUCKET, disease_key, "processed_disease")
         print("-> Total disease records:", len(disease_df))
         print("✅ Vaccination and disease data loaded successfully.")
     except Exception as e:
@@ -35,6 +37,7 @@ def load_vacc_disease_data():
     return vacc_df, disease_df
 
 #Funtion to assign country names and continents.
+@traced()
 def get_country_name(df):
     print("Adding country names to the data...")
     # Load country codes mapping
@@ -44,9 +47,9 @@ def get_country_name(df):
     
     ctry_key = "country_codes/country_codes.csv"
     #Loading countries from S3
-    count_obj = s3.get_object(Bucket=BUCKET, Key=ctry_key)
-    country_codes = pd.read_csv(io.BytesIO(count_obj["Body"].read()), low_memory=False, sep=",", on_bad_lines='skip')    
-    df = df.merge(country_codes, left_on="country", right_on="code_3", how="left", suffixes=("", "_x"))
+    country_codes = read_dataset(BUCKET, ctry_key, "country_codes", sep=",", on_bad_lines='skip')
+    with span("merge"):
+        df = df.merge(country_codes, left_on="country", right_on="code_3", how="left", suffixes=("", "_x"))
     df = df.drop(columns=["code_3"], errors="ignore")
     df.rename(columns={"country_x": "country_name"}, inplace=True)
 
@@ -54,6 +57,7 @@ def get_country_name(df):
     return df
 
 # Function to execute EDA on vaccination and disease data
+@traced()
 def execute_data_improvement(vacc_df, disease_df):
     print("Performing EDA on vaccination and disease data...")
     # Example EDA operations
@@ -85,34 +89,23 @@ def execute_data_improvement(vacc_df, disease_df):
     combined_df = combined_df.rename(columns={"disease_code": "disease_name"})
     combined_df = combined_df.dropna(subset=["value"])
     combined_df = get_country_name(combined_df)
-    # Filter rows with specific country codes.
-    combined_df = combined_df[~combined_df["country"].isin([
-        "AFR",
-        "AMR",
-        "EMR",
-        "EUR",
-        "GLOBAL",
-        "MDA",
-        "SEAR",
-        "WB_HI",
-        "WB_LI",
-        "WB_LMI",
-        "WB_UMI",
-        "WPR",
-        "XKX"
-    ])]
+    # Keep the rows that pass the validation rules: WHO regions, income groups and
+    # GLOBAL are not country codes (known_iso3); the others go to quarantine
+    rows = len(combined_df)
+    combined_df, failing, counts = validate(combined_df, load_references(BUCKET))
+    print_counts("cleaned_for_forecast", rows, counts)
+    with span("write_csv"):
+        quarantined = quarantine_frame("cleaned_for_forecast", failing)
+        publish_quarantine(BUCKET, "cleaned_for_forecast", quarantined, tmstamp)
+    # Changing column types (value and year were typed when loading)
+    combined_df[["indicator", "country", "region", "disease_name","country_name","type", "continent"]] = combined_df[[
+        "indicator", "country", "region", "disease_name","country_name","type", "continent"
+        ]].astype("string")
     # Assigning region based on country codes
     combined_df.loc[combined_df["country"].isin(["HKG","MAC"]), "region"] = "South-East Asia"
     print("\nTotal NaN values per column in combined_df:")
     print(combined_df.isnull().sum())
 
-    # Changing column types
-    combined_df["value"] = pd.to_numeric(combined_df["value"], errors="coerce").astype("float")
-    combined_df["year"] = pd.to_numeric(combined_df["year"], errors="coerce").astype("Int64")
-    combined_df[["indicator", "country", "region", "disease_name","country_name","type", "continent"]] = combined_df[[
-        "indicator", "country", "region", "disease_name","country_name","type", "continent"
-        ]].astype("string")
-
     print("Combined Data types:")
     print(combined_df.dtypes)
     #Adding data consistency.
@@ -120,12 +113,15 @@ def execute_data_improvement(vacc_df, disease_df):
     for col in combined_df:
         if (col not in(["indicator", "value", "year"])):            
             combined_df[col] = combined_df[col].str.strip().str.title()
+    # Back to compact types for the outlier step and the next stages
+    combined_df, _ = enforce(combined_df, "cleaned_for_forecast")
 
     #Data cleaned and well structured.
     print(combined_df.head(20))
     return combined_df
 
 #Function to detect and clean outliers in data.
+@traced()
 def det_clean_outliers(df_dvc):
     #declaring json to track changes
     log = {}
@@ -152,8 +148,8 @@ def det_clean_outliers(df_dvc):
             "initial_records": before,
             "cleaned_records": after,
             "removed_outliers": before - after,
-            "lower_bound": round(lower_bound, 2),
-            "upper_bound": round(upper_bound, 2)
+            "lower_bound": round(float(lower_bound), 2),
+            "upper_bound": round(float(upper_bound), 2)
         }
         cleaned_df = pd.concat([cleaned_df, sub_df], ignore_index=True)
 
@@ -161,19 +157,18 @@ def det_clean_outliers(df_dvc):
     return (cleaned_df, log)
 
 #Funtion to uploaded cleaned data back to S3
+@traced()
 def s3_store_cleaned_data(cleaned_df, jsonlog):
-    KEY_CSV = f"processed/forecasting/cleaned_for_forecast_{tmstamp}.csv"
     KEY_LOG = f"logs/eda/outlier_summary_{tmstamp}.json"
 
     # --- Upload CSV ---
-    csv_buffer = io.StringIO()
-    cleaned_df.to_csv(csv_buffer, index=False)
-    s3.put_object(Bucket=BUCKET, Key=KEY_CSV, Body=csv_buffer.getvalue())
-    print(f"✅ Cleaned data uploaded to S3 → s3://{BUCKET}/{KEY_CSV}")
+    with span("write_csv"):
+        entry = publish(BUCKET, "cleaned_for_forecast", cleaned_df, tmstamp, "processed/forecasting/")
+    print(f"✅ Cleaned data uploaded to S3 → s3://{BUCKET}/{entry['key']}")
 
     # --- Upload Log ---
     log_str = json.dumps(jsonlog, indent=2)
-    s3.put_object(Bucket=BUCKET, Key=KEY_LOG, Body=log_str)
+    put_text(BUCKET, KEY_LOG, log_str)
     print(f"📘 Log uploaded to S3 → s3://{BUCKET}/{KEY_LOG}")
 
     print("Data cleaned stored successfully")
@@ -193,11 +188,13 @@ def eda_analysis_data():
               return                
             else:
                 s3_store_cleaned_data(out_cleaned, jsonlog)
+                return out_cleaned
         else: 
             print("❌ Data combined emtpy. Process finished with errors")
 
 #Lambda handler
-def lambda_handler():
+@traced_handler("eda")
+def lambda_handler(event=None, context=None):
     print("Starting EDA on vaccination and disease data...")
     eda_analysis_data()
     print("EDA on vaccination and disease finished")
@@ -1,118 +1,300 @@
 #File to generate forecasts using multiple method
-import boto3
-import re
 import pandas as pd
 import numpy as np
-import io
-from statsmodels.tsa.api import SARIMAX, ExponentialSmoothing
-from sklearn.metrics import mean_absolute_percentage_error as mape
-from sklearn.linear_model import LinearRegression
-from xgboost import XGBRegressor
 from datetime import datetime
 from datetime import timezone as timz
+import time
 import warnings
+from forecast_backtest import run_backtest, BACKTEST_FOLDS
+from forecast_cache import ForecastCache, series_digest
+from model_registry import ModelRegistry, series_id
+from forecast_shards import shard_of, partial_key, merge_partials, delete_partials
+from global_forecaster import global_forecast, time_per_series_xgb, HORIZON
+from forecast_checkpoint import Checkpoint, SAFETY_MARGIN_MS
+from fit_metrics import FitMetrics
+from tracing import traced, traced_handler, span, annotate
+from s3_access import get_client, write_csv
+from dataset_catalog import publish, latest_key
+from schemas import read_dataset
 
-s3 = boto3.client("s3")
+s3 = get_client()
 S3_BUCKET = "vacc-disease-mlops-pipeline-argh"
 INPUT_PREFIX = "processed/forecasting/"
 InputFileName = "cleaned_for_forecast_"
+OUTPUT_PREFIX = "processed/forecast/"
+RESULT_COLUMNS = ["country", "disease", "year", "forecast", "model", "score"]
 warnings.filterwarnings("ignore")
+# Model settings that change forecasts; part of every cache key
+MODEL_CONFIG = {
+    "arima_order": [1, 1, 1],
+    "ets_trend": "add",
+    "xgb_estimators": 100,
+    "horizon": 5
+}
 
 #Function to download S3 files.
+@traced()
 def download_s3_file():
-    s3 = boto3.client("s3")
-    latest = ""
-    """Fetch the most recent file from the forecasting input folder."""
-    response = s3.list_objects_v2(Bucket=S3_BUCKET, Prefix=INPUT_PREFIX)
-    pattern = rf"{re.escape(InputFileName)}(\d{{8}})\.csv$"
-    files = [obj['Key'] for obj in response.get('Contents', []) if re.search(pattern, obj['Key'])]
-    latest = max(files, key=lambda x: re.search(r"(\d{8})", x).group(1))
-    return latest
+    """Fetch the most recent file from the forecasting input folder ("" if there is none)."""
+    return latest_key(S3_BUCKET, InputFileName.rstrip("_"), INPUT_PREFIX)
+
+#Function to fit every model on one series and keep the best one.
+def fit_series(ts, backtest=False, folds=BACKTEST_FOLDS, start_params=None, metrics=None, sid=None):
+    X = ts["year"].values.reshape(-1, 1)
+    y = ts["value"].values
+    future_years = np.array(range(ts["year"].max() + 1, ts["year"].max() + 6)).reshape(-1, 1)
+    # Model libraries are imported on first use to keep cold starts light
+    from sklearn.metrics import mean_absolute_percentage_error as mape
+    forecasts = {}
+    scores = {}
+    params = {}
+    holdout = {}
+    cost = {}
+    track = metrics.record if metrics is not None else (lambda *args, **kwargs: None)
+
+    #1. ARIMA        
+    started = time.perf_counter()
+    try:
+        from statsmodels.tsa.statespace.sarimax import SARIMAX
+        # Importing statsmodels puts "always" filters for its (and scipy's) warnings ahead of ours
+        warnings.filterwarnings("ignore")
+        model = SARIMAX (y, order=(1,1,1), seasonal_order=(0,0,0,0))
+        # Warm start from the params registered by the previous run
+        if start_params is not None and len(start_params) != model.k_params:
+            start_params = None
+        arima_fit = model.fit(disp=False, start_params=start_params)
+        forecast = arima_fit.forecast(steps=5)
+        forecasts["ARIMA"] = forecast
+        params["ARIMA"] = [float(value) for value in arima_fit.params]
+        scores["ARIMA"] = mape(y[-5:], arima_fit.predict(start=len(y)-5, end=len(y)-1))
+        track(sid, "ARIMA", started, fit=arima_fit)
+    except Exception as e:
+        track(sid, "ARIMA", started, error=e)
+
+    #2. ETS
+    started = time.perf_counter()
+    try:
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+        warnings.filterwarnings("ignore")
+        ets = ExponentialSmoothing(y, trend='add', seasonal=None).fit()
+        forecast = ets.forecast(5)
+        forecasts["ETS"] = forecast
+        params["ETS"] = {name: float(ets.params[name]) for name in
+                         ("smoothing_level", "smoothing_trend", "initial_level", "initial_trend")}
+        scores["ETS"] = mape(y[-5:], ets.predict(start=len(y)-5, end=len(y)-1))
+        track(sid, "ETS", started, fit=ets)
+    except Exception as e:
+        track(sid, "ETS", started, error=e)
+
+    # 3. Linear Regression
+    started = time.perf_counter()
+    try:
+        from sklearn.linear_model import LinearRegression
+        lr = LinearRegression().fit(X, y)
+        forecast = lr.predict(future_years)
+        forecasts["LinearRegression"] = forecast
+        params["LinearRegression"] = {"coef": float(lr.coef_[0]), "intercept": float(lr.intercept_)}
+        scores["LinearRegression"] = mape(y, lr.predict(X))
+        track(sid, "LinearRegression", started)
+    except Exception as e:
+        track(sid, "LinearRegression", started, error=e)
+    
+    # 4. XGBoost
+    started = time.perf_counter()
+    try:
+        from xgboost import XGBRegressor
+        xgb = XGBRegressor(n_estimators=100)
+        xgb.fit(X, y)
+        forecast = xgb.predict(future_years)
+        forecasts["XGBoost"] = forecast
+        scores["XGBoost"] = mape(y, xgb.predict(X))
+        track(sid, "XGBoost", started, iterations=xgb.get_booster().num_boosted_rounds())
+    except Exception as e:
+        track(sid, "XGBoost", started, error=e)
+
+    # Replace in-sample scores with rolling-origin holdout scores
+    if backtest and forecasts:
+        holdout, cost = run_backtest(X, y, folds, models=forecasts.keys())
+        if holdout:
+            scores = holdout
+
+    # Choose best
+    if not scores:
+        return None
+    best_model = min(scores, key=scores.get)
+    if metrics is not None:
+        metrics.win(sid, best_model)
+    return {
+        "model": best_model,
+        "score": float(scores[best_model]),
+        "years": [int(year) for year in future_years.flatten()],
+        "forecast": [float(value) for value in forecasts[best_model]],
+        "params": params,
+        "holdout": holdout,
+        "cost": cost
+    }
+
+#Function to upload a forecast DataFrame as CSV.
+@traced()
+def save_forecasts(df_result, key):
+    with span("write_csv"):
+        write_csv(df_result, S3_BUCKET, key)
+    print(f"✅ Forecasts saved to S3 → {key}")
+
+#Function to upload the final forecasts of a run and record them in the catalog.
+@traced()
+def publish_forecasts(df_result, run_date):
+    with span("write_csv"):
+        entry = publish(S3_BUCKET, "forecasted_data", df_result, run_date, OUTPUT_PREFIX)
+    print(f"✅ Forecasts saved to S3 → {entry['key']}")
 
 #Main method to group data and generate forecasting models.
-def generate_forecast_models(df):
-    results = []
+@traced("forecast_loop")
+def generate_forecast_models(df, backtest=False, folds=BACKTEST_FOLDS, use_cache=True,
+                             shard_index=0, shard_count=1, run_date=None,
+                             context=None, input_key=None, margin_ms=SAFETY_MARGIN_MS):
+    """Return the forecast DataFrame, or None when paused at the deadline with a checkpoint."""
+    backtest_scores = {}
+    backtest_cost = {}
+    run_date = run_date or datetime.now(tz=timz.utc).strftime("%Y%m%d")
+    config = dict(MODEL_CONFIG, backtest=backtest, folds=folds if backtest else 0)
+    cache = ForecastCache(s3, S3_BUCKET)
+    if use_cache:
+        cache.load()
+    registry = ModelRegistry(s3, S3_BUCKET).load()
+
+    # Keep cache and registry progress whenever a checkpoint is written
+    def persist_state():
+        if shard_count > 1:
+            registry.save_partial(shard_index)
+            if use_cache:
+                cache.save_partial(shard_index)
+        else:
+            registry.save()
+            if use_cache:
+                cache.save()
+
+    metrics = FitMetrics()
+    checkpoint = Checkpoint(s3, S3_BUCKET, run_date, shard_index, shard_count)
+    cursor, results = checkpoint.load(input_key)
     df_dis = df[df["type"] == "Disease"]
-    print("Starting with forecasting process")
-    for (country, disease), group in df_dis.groupby(["country", "disease_name"]):
+    print(f"Starting with forecasting process (shard {shard_index + 1}/{shard_count})")
+    for position, ((country, disease), group) in enumerate(df_dis.groupby(["country", "disease_name"], observed=True)):
+        if position < cursor:
+            continue
+        reason = checkpoint.due(context, margin_ms)
+        if reason:
+            persist_state()
+            checkpoint.save(input_key, position, results)
+            if reason == "deadline":
+                print(f"⏸️ Stopping at series {position} before the Lambda timeout")
+                metrics.emit(s3, S3_BUCKET, run_date, shard_index, shard_count)
+                return None
+        sid = series_id(country, disease)
+        if shard_count > 1 and shard_of(sid, shard_count) != shard_index:
+            continue
         ts = group.sort_values("year")[["year", "value"]].dropna()
         if len(ts) < 5:
             continue
-        X = ts["year"].values.reshape(-1, 1)
-        y = ts["value"].values
-        future_years = np.array(range(ts["year"].max() + 1, ts["year"].max() + 6)).reshape(-1, 1)
-        forecasts = {}
-        scores = {}
-
-        #1. ARIMA        
-        try:
-            model = SARIMAX (y, order=(1,1,1), seasonal_order=(0,0,0,0))
-            arima_fit = model.fit(disp=False)
-            forecast = arima_fit.forecast(steps=5)
-            forecasts["ARIMA"] = forecast
-            scores["ARIMA"] = mape(y[-5:], arima_fit.predict(start=len(y)-5, end=len(y)-1))
-        except Exception as e:
-            pass
-
-        #2. ETS
-        try:
-            ets = ExponentialSmoothing(y, trend='add', seasonal=None).fit()
-            forecast = ets.forecast(5)
-            forecasts["ETS"] = forecast
-            scores["ETS"] = mape(y[-5:], ets.predict(start=len(y)-5, end=len(y)-1))
-        except Exception as e:
-            pass
-
-        # 3. Linear Regression
-        try:
-            lr = LinearRegression().fit(X, y)
-            forecast = lr.predict(future_years)
-            forecasts["LinearRegression"] = forecast
-            scores["LinearRegression"] = mape(y, lr.predict(X))
-        except Exception as e:
-            pass
-        
-        # 4. XGBoost
-        try:
-            xgb = XGBRegressor(n_estimators=100)
-            xgb.fit(X, y)
-            forecast = xgb.predict(future_years)
-            forecasts["XGBoost"] = forecast
-            scores["XGBoost"] = mape(y, xgb.predict(X))
-        except Exception as e:
-            pass
-
-        # Choose best
-        if scores:
-            best_model = min(scores, key=scores.get)
-            best_forecast = forecasts[best_model]
-            for i, year in enumerate(future_years.flatten()):
-                results.append({
-                    "country": country,
-                    "disease": disease,
-                    "year": int(year),
-                    "forecast": float(best_forecast[i]),
-                    "model": best_model
-                })
+
+        # Serve unchanged series from the cache
+        digest = series_digest(ts, config)
+        best = cache.get(digest) if use_cache else None
+        if best is None:
+            best = fit_series(ts, backtest, folds, start_params=registry.start_params(sid),
+                              metrics=metrics, sid=sid)
+            if best is None:
+                continue
+            registry.register(sid, ts, best, MODEL_CONFIG["arima_order"])
+            for name, seconds in best.pop("cost").items():
+                backtest_cost[name] = backtest_cost.get(name, 0.0) + seconds
+            for name, score in best.pop("holdout").items():
+                backtest_scores.setdefault(name, []).append(score)
+            cache.put(digest, best)
+
+        for year, value in zip(best["years"], best["forecast"]):
+            results.append({
+                "country": country,
+                "disease": disease,
+                "year": year,
+                "forecast": value,
+                "model": best["model"],
+                "score": best["score"]
+            })
 
     print("Forecasting process complete.")
-    # Upload results
-    df_result = pd.DataFrame(results)
-    csv_buffer = io.StringIO()
-    df_result.to_csv(csv_buffer, index=False)
-    # Create timestamp
-    tmstamp = datetime.now(tz=timz.utc).strftime("%Y%m%d")
-    output_key = f"/processed/forecast/forecasted_data_{tmstamp}.csv"
-    s3.put_object(Bucket=S3_BUCKET, Key=output_key, Body=csv_buffer.getvalue())
-    print(f"✅ Forecasts saved to S3 → {output_key}")
+    if backtest:
+        print(f"Backtest summary ({folds} folds):")
+        for name in backtest_cost:
+            model_scores = backtest_scores.get(name, [])
+            mean_score = np.mean(model_scores) if model_scores else float("nan")
+            print(f"-> {name}: holdout MAPE {mean_score:.4f} over {len(model_scores)} series, "
+                  f"backtest cost {backtest_cost[name]:.2f}s")
+    if use_cache:
+        print(f"Forecast cache: {cache.hits} hits, {cache.misses} misses")
+    metrics.cached = cache.hits
+    metrics.emit(s3, S3_BUCKET, run_date, shard_index, shard_count)
 
-    return
+    # Upload results; shards write partials that reduce_forecasts merges later
+    df_result = pd.DataFrame(results, columns=RESULT_COLUMNS)
+    persist_state()
+    if shard_count > 1:
+        save_forecasts(df_result, partial_key(run_date, shard_index, shard_count))
+    else:
+        if use_cache:
+            print(f"Forecast cache: {cache.evicted} stale entries evicted")
+        publish_forecasts(df_result, run_date)
+    checkpoint.clear()
+    return df_result
+
+#Main method to forecast all series with one global cross-series model.
+@traced()
+def generate_global_forecasts(df, run_date=None, compare=False):
+    run_date = run_date or datetime.now(tz=timz.utc).strftime("%Y%m%d")
+    print("Starting with global forecasting process")
+    results, stats = global_forecast(df)
+    print(f"Global model: {stats['series']} series, trained in {stats['train_s']:.2f}s, "
+          f"batched {HORIZON}-year forecast in {stats['predict_s']:.2f}s")
+    if compare:
+        loop = time_per_series_xgb(df)
+        print(f"Per-series XGBoost loop: {loop['fits']} fits in {loop['train_s']:.2f}s "
+              f"({loop['train_s'] / max(stats['train_s'], 1e-9):.1f}x the global training time)")
+    df_result = pd.DataFrame(results, columns=RESULT_COLUMNS)
+    publish_forecasts(df_result, run_date)
+    return df_result
+
+#Main method to merge shard outputs into one forecast file.
+@traced()
+def reduce_forecasts(shard_count, run_date=None):
+    run_date = run_date or datetime.now(tz=timz.utc).strftime("%Y%m%d")
+    merged, keys = merge_partials(s3, S3_BUCKET, run_date, shard_count,
+                                  sort_by=["country", "disease", "year"])
+    if merged is None:
+        print(f"❌ Found {len(keys)} of {shard_count} shard outputs for {run_date}")
+        return {
+            "statusCode": 409,
+            "body": f"❌ Missing shard outputs: {len(keys)} of {shard_count} found"
+        }
+    cache = ForecastCache(s3, S3_BUCKET).load()
+    cache.merge_partials(shard_count)
+    cache.save()
+    registry = ModelRegistry(s3, S3_BUCKET).load()
+    registry.merge_partials(shard_count)
+    registry.save()
+    publish_forecasts(merged, run_date)
+    delete_partials(s3, S3_BUCKET, keys)
+    return {
+        "statusCode": 200,
+        "body": f"✅ Merged {shard_count} forecast shards"
+    }
 
 #Main method to execute forecast
-def execute_forecast(key):
+def execute_forecast(key, backtest=False, use_cache=True, shard_index=0, shard_count=1, run_date=None,
+                     global_model=False, compare=False, context=None, margin_ms=SAFETY_MARGIN_MS):
     """Download a CSV file from S3 into a DataFrame."""
-    response = s3.get_object(Bucket=S3_BUCKET, Key=key)
-    df = pd.read_csv(response['Body'])
+    with span("load_input"):
+        df = read_dataset(S3_BUCKET, key, "cleaned_for_forecast")
+        annotate(rows_out=len(df))
     if (df.empty == True):
         return {
         "statusCode": 404,
@@ -120,15 +302,60 @@ def execute_forecast(key):
     }
     else:
         print(f"✅ Data loaded from S3 with " + str(len(df)) + " records")
-        generate_forecast_models(df)
+        if global_model:
+            generate_global_forecasts(df, run_date=run_date, compare=compare)
+            return
+        # Resolved here so a paused run can hand it back: the checkpoint is keyed on it
+        run_date = run_date or datetime.now(tz=timz.utc).strftime("%Y%m%d")
+        df_result = generate_forecast_models(df, backtest=backtest, use_cache=use_cache,
+                                             shard_index=shard_index, shard_count=shard_count,
+                                             run_date=run_date, context=context, input_key=key,
+                                             margin_ms=margin_ms)
+        if df_result is None:
+            return {
+                "statusCode": 202,
+                "body": "⏸️ Forecast checkpointed before timeout — invoke again with this run_date to resume",
+                "resume": True,
+                "run_date": run_date
+            }
     return
 
 #lambda handler for AWS
-def lambda_handler():
+#Event keys (all optional): backtest, use_cache, shard_index, shard_count, run_date,
+#reduce=True to merge the partial outputs of shard_count shards, and global_model=True
+#(with compare=True to also time the per-series loop) for the unsharded global model.
+#A 202 response with resume=True means progress was checkpointed: invoke again with
+#the same event plus the returned run_date to continue. The checkpoint is kept per
+#run_date, so a resume without it after midnight UTC would start over.
+@traced_handler("forecast")
+def lambda_handler(event=None, context=None):
+    event = event or {}
+    shard_count = int(event.get("shard_count", 1))
+    shard_index = int(event.get("shard_index", 0))
+    run_date = event.get("run_date")
+    if event.get("reduce"):
+        return reduce_forecasts(shard_count, run_date)
+    if event.get("global_model") and shard_count > 1:
+        return {
+            "statusCode": 400,
+            "body": "❌ The global model runs unsharded"
+        }
+    if not 0 <= shard_index < shard_count:
+        return {
+            "statusCode": 400,
+            "body": f"❌ Invalid shard {shard_index} of {shard_count}"
+        }
     latest_key = download_s3_file ()
     if (latest_key != ""):
         print(f"📥 Latest input: {latest_key}")
-        execute_forecast(latest_key)
+        response = execute_forecast(latest_key, backtest=event.get("backtest", False),
+                                    use_cache=event.get("use_cache", True),
+                                    shard_index=shard_index, shard_count=shard_count, run_date=run_date,
+                                    global_model=event.get("global_model", False),
+                                    compare=event.get("compare", False), context=context,
+                                    margin_ms=int(event.get("safety_margin_ms", SAFETY_MARGIN_MS)))
+        if response is not None:
+            return response
     else: 
         return {
         "statusCode": 404,
@@ -137,4 +364,4 @@ def lambda_handler():
     return {
         "statusCode": 200,
         "body": "✅ Forecast models generated"
-    }
\ No newline at end of file
+    }
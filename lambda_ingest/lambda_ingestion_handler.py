@@ -1,51 +1,42 @@
 import json
 import requests
-import boto3
 import pandas as pd
 from datetime import datetime
 from datetime import timezone as timz
-
-# Vaccination indicators (WHO API codes)
-VACCINE_INDICATORS = {
-    "diphtheria": "WHS4_100",
-    "measles": "WHS8_110",
-    "polio": "WHS4_544",
-    "hepatitis_b": "WHS4_117"
-}
-
-# Disease indicators (reported cases or incidence)
-DISEASE_INDICATORS = {
-    "measles": "WHS3_62",
-    "diphtheria": "WHS3_41",
-    "polio": "WHS3_49",
-    "hepatitis_b": "HEPATITIS_HBV_INFECTIONS_NEW_NUM"
-}
+from tracing import traced, traced_handler, annotate
+from s3_access import get_client, write_csv
+from indicators import VACCINE_INDICATORS, DISEASE_INDICATORS
 
 # WHO API base
 BASE_URL = "https://ghoapi.azureedge.net/api/"
 
 # Your S3 bucket
 S3_BUCKET = "vacc-disease-mlops-pipeline-argh"
-s3 = boto3.client("s3")
+s3 = get_client()
+# One HTTP session so every indicator request reuses the same connection
+http = requests.Session()
 
+@traced()
 def download_and_upload(category, name, code):
     url = f"{BASE_URL}{code}?$format=json"
     print(f"🔄 Fetching {name} data from {url}")
     try:
-        r = requests.get(url)
+        r = http.get(url)
         if r.status_code == 200:
+            annotate(bytes_in=len(r.content))
             data = r.json().get("value", [])
             df = pd.DataFrame(data)
             timestamp = datetime.now(tz=timz.utc).strftime("%Y%m%d")
             key = f"raw/{category}/{name}_{timestamp}.csv"
-            csv_buffer = df.to_csv(index=False)
-            s3.put_object(Body=csv_buffer, Bucket=S3_BUCKET, Key=key)
+            annotate(rows_out=len(df))
+            write_csv(df, S3_BUCKET, key)
             print(f"✅ Uploaded to S3 → {key}")
         else:
             print(f"❌ HTTP {r.status_code} error for {name}")
     except Exception as e:
         print(f"❌ Error downloading {name}: {e}")
 
+@traced_handler("ingest")
 def lambda_handler(event=None, context=None):
     print("🚀 Starting ingestion process...")
 
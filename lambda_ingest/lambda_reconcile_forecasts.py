@@ -0,0 +1,211 @@
+#File to reconcile the country forecasts across the country → region → continent hierarchy.
+#Country forecasts are fitted independently, so they do not add up to regional or
+#continental totals. The hierarchy is a sparse summing matrix S = [A; I] built from
+#the country dimension of the forecast input, and every (disease, year) horizon is one
+#column, so all horizons are reconciled together with matrix products and one batched
+#solve instead of a loop over groups:
+#  bottom_up  S @ country forecasts
+#  ols        minimum-trace reconciliation with W = I
+#  mint       minimum-trace reconciliation with W = diag(one-step residual variances)
+#OLS and MinT also need forecasts of the aggregates; they come from a drift over the
+#aggregated history (one more matrix product, no model fits).
+import json
+import os
+import warnings
+from datetime import datetime
+from datetime import timezone as timz
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from tracing import traced, traced_handler, span, annotate
+from dataset_catalog import publish, latest
+from schemas import read_dataset
+
+# S3 config
+S3_BUCKET = "vacc-disease-mlops-pipeline-argh"
+INPUT_PREFIX = "processed/forecasting/"
+FORECAST_PREFIX = "processed/forecast/"
+OUTPUT_PREFIX = "processed/reconciliation/"
+# Reconciliation config
+METHODS = os.environ.get("RECONCILE_METHODS", "bottom_up").split(",")
+ALL_METHODS = ["bottom_up", "ols", "mint"]
+# Years of history behind the aggregate drift forecasts and the residual variances
+DRIFT_YEARS = 10
+MIN_VARIANCE = 1e-6
+TOTAL = "Total"
+UNKNOWN = "Unknown"
+
+#Function to map every forecast country to its region and continent (first seen in the input).
+def country_hierarchy(df, countries):
+    levels = df[["country", "region", "continent"]].astype(object).drop_duplicates("country")
+    return levels.set_index("country").reindex(countries).fillna(UNKNOWN)
+
+#Function to build the aggregate rows A of the summing matrix S = [A; I].
+def summing_matrix(hierarchy):
+    """Return (nodes, A): nodes lists the (level, name) of every aggregate, A is a sparse
+    aggregates x countries 0/1 matrix with one row for the total, each continent and each region."""
+    count = len(hierarchy)
+    nodes = [("total", TOTAL)]
+    rows = [np.zeros(count, dtype=np.int64)]
+    for level in ("continent", "region"):
+        codes, names = pd.factorize(hierarchy[level], sort=True)
+        rows.append(codes + len(nodes))
+        nodes += [(level, name) for name in names]
+    rows = np.concatenate(rows)
+    cols = np.tile(np.arange(count), len(rows) // count)
+    A = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(nodes), count))
+    return nodes, A
+
+#Function to stack the countries' reported cases as a countries x diseases x years cube.
+def history_cube(df, countries, diseases):
+    cases = df[df["type"] == "Disease"]
+    years = np.arange(int(cases["year"].min()), int(cases["year"].max()) + 1)
+    table = cases.pivot_table(index="country", columns=["disease_name", "year"], values="value",
+                              aggfunc="mean", observed=True)
+    table = table.reindex(index=countries, columns=pd.MultiIndex.from_product([diseases, years]))
+    # Carry the last report forward inside each series so a gap does not read as a drop
+    values = pd.DataFrame(table.to_numpy(dtype="float64").reshape(-1, len(years))).ffill(axis=1)
+    return values.to_numpy().reshape(len(countries), len(diseases), len(years)), years
+
+#Function to get drift forecasts and one-step residual variances of a stack of series.
+def drift(cube, years, horizon_years, disease_of_column):
+    """cube is series x diseases x years; returns (forecasts, variances), both series x columns."""
+    window = cube[:, :, -(DRIFT_YEARS + 1):]
+    steps = np.diff(window, axis=2)
+    # Series without reports in the window have no steps: slope and variance 0
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        slope = np.nan_to_num(np.nanmean(steps, axis=2))
+        variance = np.nan_to_num(np.nanvar(steps - slope[:, :, None], axis=2))
+    last = np.nan_to_num(cube[:, :, -1])
+    ahead = horizon_years - years[-1]
+    forecasts = last[:, disease_of_column] + slope[:, disease_of_column] * ahead
+    return forecasts, np.maximum(variance[:, disease_of_column], MIN_VARIANCE)
+
+#Main method to reconcile every (disease, year) column at once.
+def reconcile(A, base_b, base_a, w_b, w_a):
+    """Minimum-trace reconciliation with a diagonal W, one column per (disease, year).
+    base_b/w_b are countries x columns (w_b 0 where a country has no forecast, so it is not
+    adjusted), base_a/w_a aggregates x columns. Returns (aggregates, countries) that satisfy
+    A @ countries == aggregates in every column."""
+    dense = A.toarray()
+    residual = base_a - A @ base_b
+    # C W C' with C = [I, -A] for every column at once: aggregates x aggregates per column
+    gram = np.einsum("an,nc,bn->cab", dense, w_b, dense)
+    diagonal = np.arange(len(dense))
+    gram[:, diagonal, diagonal] += w_a.T
+    multipliers = np.linalg.solve(gram, residual.T[:, :, None])[:, :, 0].T
+    return base_a - w_a * multipliers, base_b + w_b * (A.T @ multipliers)
+
+#Main method to build the reconciled forecasts of every level.
+@traced()
+def reconcile_forecasts(forecasts, df, methods=METHODS):
+    """Return one row per (level, node, disease, year) with the base forecast and one column per method."""
+    unknown = sorted(set(methods) - set(ALL_METHODS))
+    if unknown:
+        raise ValueError(f"Unknown reconciliation methods: {unknown}")
+    table = forecasts.pivot_table(index="country", columns=["disease", "year"], values="forecast",
+                                  aggfunc="mean", observed=True)
+    table.columns = table.columns.remove_unused_levels()
+    countries = list(table.index.astype(str))
+    diseases = list(table.columns.levels[0].astype(str))
+    disease_of_column = table.columns.codes[0]
+    horizon_years = table.columns.get_level_values(1).to_numpy(dtype="float64")
+    present = table.notna().to_numpy()
+    base_b = np.nan_to_num(table.to_numpy(dtype="float64"))
+
+    hierarchy = country_hierarchy(df, countries)
+    nodes, A = summing_matrix(hierarchy)
+    S = sparse.vstack([A, sparse.identity(len(countries), format="csr")]).tocsr()
+    print(f"Summing matrix: {S.shape[0]} nodes x {S.shape[1]} countries ({S.nnz} non-zeros), "
+          f"{table.shape[1]} (disease, year) columns")
+    # Aggregates exist in a column when at least one of their countries has a forecast there
+    members = A @ present.astype("float64")
+    results = {"base": np.vstack([np.full(members.shape, np.nan), np.where(present, base_b, np.nan)])}
+    with span("bottom_up"):
+        results["bottom_up"] = S @ base_b
+
+    if "ols" in methods or "mint" in methods:
+        with span("drift"):
+            cube, years = history_cube(df, countries, diseases)
+            drift_b, variance_b = drift(cube, years, horizon_years, disease_of_column)
+            # The drift is linear in the data, so an aggregate's drift over the countries
+            # forecast in a column is the sum of theirs
+            base_a = A @ (drift_b * present)
+            # Variances of the aggregates need their own history: sums of the forecast countries
+            forecast_for = present @ (disease_of_column[:, None] == np.arange(len(diseases)))
+            masked = np.where(forecast_for[:, :, None], np.nan_to_num(cube), 0.0)
+            aggregated = (A @ masked.reshape(len(countries), -1)).reshape(len(nodes), *cube.shape[1:])
+            _, variance_a = drift(aggregated, years, horizon_years, disease_of_column)
+        results["base"][:len(nodes)] = np.where(members > 0, base_a, np.nan)
+        incoherence = np.abs(base_a - A @ base_b)
+        print(f"-> Aggregate drift forecasts differ from the country sums by up to {incoherence.max():.1f}")
+        weights = {"ols": (present.astype("float64"), np.ones_like(base_a)),
+                   "mint": (variance_b * present, variance_a)}
+        for method in ("ols", "mint"):
+            if method in methods:
+                with span(method):
+                    w_b, w_a = weights[method]
+                    reconciled_a, reconciled_b = reconcile(A, base_b, base_a, w_b, w_a)
+                    results[method] = np.vstack([reconciled_a, reconciled_b])
+                print(f"-> {method}: largest incoherence after {np.abs(reconciled_a - A @ reconciled_b).max():.2e}")
+
+    # One output row per node and column, only where the node has data
+    keep = np.vstack([members > 0, present]).ravel()
+    labels = nodes + [("country", country) for country in countries]
+    columns = len(horizon_years)
+    out = pd.DataFrame({
+        "level": np.repeat([level for level, _ in labels], columns)[keep],
+        "node": np.repeat([name for _, name in labels], columns)[keep],
+        "disease": np.tile(np.array(diseases)[disease_of_column], len(labels))[keep],
+        "year": np.tile(horizon_years.astype("int64"), len(labels))[keep],
+    })
+    for name in ["base"] + [method for method in ALL_METHODS if method in results]:
+        out[name] = results[name].ravel()[keep]
+    annotate(rows_out=len(out))
+    return out
+
+#Function to load the latest forecasts and the forecast input they were fitted on.
+@traced()
+def load_inputs():
+    forecast_entry = latest(S3_BUCKET, "forecasted_data", FORECAST_PREFIX)
+    input_entry = latest(S3_BUCKET, "cleaned_for_forecast", INPUT_PREFIX)
+    if forecast_entry is None or input_entry is None:
+        return None, None
+    forecasts = read_dataset(S3_BUCKET, forecast_entry["key"], "forecasted_data")
+    df = read_dataset(S3_BUCKET, input_entry["key"], "cleaned_for_forecast")
+    return forecasts, df
+
+#Lambda handler
+#Event keys (all optional): methods, e.g. ["bottom_up", "ols", "mint"] (default
+#RECONCILE_METHODS or bottom_up; bottom_up is always included), run_date.
+@traced_handler("reconcile")
+def lambda_handler(event=None, context=None):
+    event = event or {}
+    print("🚀 Starting forecast reconciliation...")
+    forecasts, df = load_inputs()
+    if forecasts is None or forecasts.empty:
+        print("❌ No forecasts to reconcile")
+        return {
+            "statusCode": 404,
+            "body": "❌ Forecasts for reconciliation not found"
+        }
+    methods = set(event.get("methods", METHODS)) | {"bottom_up"}
+    try:
+        reconciled = reconcile_forecasts(forecasts, df, methods)
+    except ValueError as e:
+        return {
+            "statusCode": 400,
+            "body": f"❌ {e}"
+        }
+    run_date = event.get("run_date") or datetime.now(tz=timz.utc).strftime("%Y%m%d")
+    with span("write_csv"):
+        entry = publish(S3_BUCKET, "reconciled_forecasts", reconciled, run_date, OUTPUT_PREFIX)
+    print(f"✅ Reconciled forecasts saved to S3 → {entry['key']}")
+    return {
+        "statusCode": 200,
+        "body": json.dumps(f"✅ Reconciled {len(reconciled)} forecasts ({', '.join(sorted(methods))})")
+    }
+
+if __name__ == "__main__":
+    print(lambda_handler({"methods": ALL_METHODS}))
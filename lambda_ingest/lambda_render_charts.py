@@ -0,0 +1,295 @@
+#File to render one chart per (country, disease) from the aggregated and forecast outputs.
+#Each chart shows the reported cases with their anomalies, the forecast continuing the
+#history and the vaccination coverage on a second axis. Charts are drawn headless (Agg)
+#in a process pool, a series is only redrawn when the hash of its data changed since
+#the last run, and charts/index.json lists every chart with its key and data hash.
+import hashlib
+import io
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from datetime import timezone as timz
+import numpy as np
+from tracing import traced, traced_handler, span, annotate
+from s3_access import get_client, put_text
+from dataset_catalog import latest
+from schemas import read_dataset
+from forecast_checkpoint import time_left_ms, SAFETY_MARGIN_MS
+
+# S3 config
+S3_BUCKET = "vacc-disease-mlops-pipeline-argh"
+s3 = get_client()
+CHART_PREFIX = "charts/"
+INDEX_KEY = f"{CHART_PREFIX}index.json"
+COUNTRY_CODES_KEY = "country_codes/country_codes.csv"
+# Rendering config; bump RENDER_VERSION when the layout changes to redraw every chart
+RENDER_VERSION = 1
+MAX_WORKERS = int(os.environ.get("CHART_WORKERS", os.cpu_count() or 1))
+# Series per pool task: large enough to amortize the pickling, small enough to balance
+BATCH_SIZE = 25
+UPLOAD_THREADS = 16
+FIG_SIZE = (6.4, 3.6)
+DPI = 80
+
+#Function to build the S3 key of one chart.
+def chart_key(country, disease):
+    slug = lambda text: re.sub(r"[^A-Za-z0-9]+", "_", str(text)).strip("_")
+    return f"{CHART_PREFIX}{slug(disease)}/{slug(country)}.png"
+
+#Function to load the latest aggregated and forecast outputs with the country names.
+@traced()
+def load_inputs():
+    """Return (anomalies, forecasts, versions); forecasts get the country_name the aggregates use."""
+    anomaly_entry = latest(S3_BUCKET, "grouped_combined_data", "aggregated/forecasting/")
+    forecast_entry = latest(S3_BUCKET, "forecasted_data", "processed/forecast/")
+    if anomaly_entry is None:
+        return None, None, {}
+    anomalies = read_dataset(S3_BUCKET, anomaly_entry["key"], "grouped_combined_data")
+    versions = {"grouped_combined_data": anomaly_entry["version"]}
+    forecasts = None
+    if forecast_entry is not None:
+        forecasts = read_dataset(S3_BUCKET, forecast_entry["key"], "forecasted_data")
+        versions["forecasted_data"] = forecast_entry["version"]
+        # Forecasts are keyed by country code; EDA title-cases both codes and names
+        codes = read_dataset(S3_BUCKET, COUNTRY_CODES_KEY, "country_codes", on_bad_lines="skip")
+        names = dict(zip(codes["code_3"].astype(str).str.strip().str.title(),
+                         codes["country"].astype(str).str.strip().str.title()))
+        forecasts["country_name"] = forecasts["country"].astype(str).map(names)
+    return anomalies, forecasts, versions
+
+#Function to split the outputs into one payload of plain arrays per (country, disease).
+@traced()
+def build_series(anomalies, forecasts):
+    series = {}
+    anomalies = anomalies.sort_values(["country_name", "disease_name", "type", "year"])
+    for (country, disease, kind), group in anomalies.groupby(
+            ["country_name", "disease_name", "type"], observed=True, sort=False):
+        payload = series.setdefault((str(country), str(disease)), {})
+        payload[str(kind).lower()] = {
+            "years": group["year"].to_numpy(dtype="float64"),
+            "values": group["value"].to_numpy(dtype="float64"),
+            "anomaly": group["anomaly"].notna().to_numpy(),
+        }
+    if forecasts is not None:
+        forecasts = forecasts.dropna(subset=["country_name"]).sort_values(["country_name", "disease", "year"])
+        for (country, disease), group in forecasts.groupby(["country_name", "disease"], observed=True, sort=False):
+            payload = series.get((str(country), str(disease)))
+            if payload is not None:
+                payload["forecast"] = {
+                    "years": group["year"].to_numpy(dtype="float64"),
+                    "values": group["forecast"].to_numpy(dtype="float64"),
+                    "model": str(group["model"].iloc[0]),
+                }
+    return series
+
+#Function to hash the data a chart is drawn from.
+def series_hash(payload):
+    digest = hashlib.sha256(f"v{RENDER_VERSION}".encode())
+    for part in ("disease", "vaccination", "forecast"):
+        for name, value in sorted(payload.get(part, {}).items()):
+            digest.update(f"{part}.{name}".encode())
+            digest.update(value.tobytes() if isinstance(value, np.ndarray) else str(value).encode())
+    return digest.hexdigest()
+
+_figure = None
+# Stand-in for a part of the chart without data
+NO_DATA = {"years": np.array([]), "values": np.array([]), "anomaly": np.array([], dtype=bool)}
+
+#Function to get the figure of this worker process, created on first use and reused.
+def worker_figure():
+    """Return (figure, axes, twin axes, lines); charts update the lines' data instead of clearing
+    the axes, since rebuilding the ticks after clear() costs most of a chart."""
+    global _figure
+    if _figure is None:
+        import matplotlib
+        matplotlib.use("Agg")
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.ticker import MaxNLocator
+        figure = Figure(figsize=FIG_SIZE, dpi=DPI)
+        FigureCanvasAgg(figure)
+        # Fixed margins instead of tight_layout, which costs a layout pass per chart
+        figure.subplots_adjust(left=0.13, right=0.89, top=0.9, bottom=0.14)
+        ax = figure.add_subplot()
+        coverage_ax = ax.twinx()
+        lines = {
+            "cases": ax.plot([], [], color="tab:red", marker="o", markersize=3, label="Reported cases")[0],
+            "forecast": ax.plot([], [], color="tab:red", linestyle="--")[0],
+            "cases_anomaly": ax.plot([], [], color="black", linestyle="none", marker="^", label="Anomaly")[0],
+            "coverage": coverage_ax.plot([], [], color="tab:blue", alpha=0.6, label="Vaccination coverage")[0],
+            "coverage_anomaly": coverage_ax.plot([], [], color="tab:blue", linestyle="none", marker="v")[0],
+        }
+        ax.xaxis.set_major_locator(MaxNLocator(integer=True))
+        ax.set_xlabel("Year")
+        ax.set_ylabel("Cases")
+        coverage_ax.set_ylabel("Coverage")
+        _figure = (figure, ax, coverage_ax, lines)
+    return _figure
+
+#Function to point one line at new data, hiding it when there is none.
+def set_line(line, years, values):
+    line.set_data(years, values)
+    line.set_visible(len(years) > 0)
+
+#Function to draw one chart and return the PNG bytes.
+def render_chart(country, disease, payload):
+    figure, ax, coverage_ax, lines = worker_figure()
+    cases = payload.get("disease", NO_DATA)
+    coverage = payload.get("vaccination", NO_DATA)
+    forecast = payload.get("forecast")
+    set_line(lines["cases"], cases["years"], cases["values"])
+    set_line(lines["cases_anomaly"], cases["years"][cases["anomaly"]], cases["values"][cases["anomaly"]])
+    set_line(lines["coverage"], coverage["years"], coverage["values"])
+    set_line(lines["coverage_anomaly"], coverage["years"][coverage["anomaly"]],
+             coverage["values"][coverage["anomaly"]])
+    if forecast is not None and len(cases["years"]):
+        # Start the forecast line at the last observation so the two connect
+        set_line(lines["forecast"], np.r_[cases["years"][-1], forecast["years"]],
+                 np.r_[cases["values"][-1], forecast["values"]])
+        lines["forecast"].set_label(f"Forecast ({forecast['model']})")
+    else:
+        set_line(lines["forecast"], NO_DATA["years"], NO_DATA["values"])
+    for axis, data in ((ax, cases), (coverage_ax, coverage)):
+        axis.relim(visible_only=True)
+        axis.autoscale_view()
+        axis.yaxis.set_visible(len(data["years"]) > 0)
+    # The twin axes are drawn last, so the legend goes there to stay on top of both
+    coverage_ax.legend(handles=[line for name, line in lines.items() if line.get_visible() and name != "coverage_anomaly"],
+              fontsize="x-small", loc="upper left")
+    ax.set_title(f"{country} — {disease}", fontsize="medium")
+    buffer = io.BytesIO()
+    # Fast zlib level: a third of the encode time for slightly larger files
+    figure.savefig(buffer, format="png", pil_kwargs={"compress_level": 1})
+    return buffer.getvalue()
+
+#Function run in the pool: draw a batch of charts and return [(key, png bytes)].
+def render_batch(batch):
+    return [(key, render_chart(country, disease, payload)) for key, country, disease, payload in batch]
+
+#Function to upload one chart.
+def upload_chart(key, body):
+    s3.put_object(Bucket=S3_BUCKET, Key=key, Body=body, ContentType="image/png")
+    annotate(bytes_out=len(body))
+
+#Main method to draw the batches in a process pool and upload the charts as they finish.
+@traced()
+def render_all(batches, workers=MAX_WORKERS, context=None, margin_ms=SAFETY_MARGIN_MS):
+    """Return the keys uploaded; stops submitting batches when the invocation is about to time out."""
+    done_keys = []
+    uploads = []
+    pending = list(reversed(batches))
+    with ThreadPoolExecutor(max_workers=UPLOAD_THREADS) as uploader:
+        def collect(results):
+            for key, body in results:
+                uploads.append(uploader.submit(upload_chart, key, body))
+                done_keys.append(key)
+
+        try:
+            pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        except (OSError, NotImplementedError) as e:
+            # Lambda has no /dev/shm, so multiprocessing is not available there
+            print(f"ℹ️ No process pool ({e}) — rendering in-process.")
+            pool = None
+        if pool is None:
+            while pending:
+                left = time_left_ms(context)
+                if left is not None and left < margin_ms:
+                    break
+                collect(render_batch(pending.pop()))
+        else:
+            with pool:
+                running = set()
+                while pending or running:
+                    left = time_left_ms(context)
+                    # Keep two batches per worker in flight so no worker waits on the parent
+                    while pending and len(running) < 2 * workers and (left is None or left >= margin_ms):
+                        running.add(pool.submit(render_batch, pending.pop()))
+                    if not running:
+                        break
+                    finished, running = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        collect(future.result())
+        for upload in uploads:
+            upload.result()
+    return done_keys
+
+#Function to read the chart index of the last run.
+def load_index():
+    try:
+        return json.loads(s3.get_object(Bucket=S3_BUCKET, Key=INDEX_KEY)["Body"].read())
+    except s3.exceptions.NoSuchKey:
+        return {"charts": {}}
+
+#Main method to redraw the charts whose data changed and update the index.
+@traced()
+def render_charts(force=False, workers=MAX_WORKERS, context=None, margin_ms=SAFETY_MARGIN_MS):
+    """Return {total, rendered, unchanged, removed, remaining}, or None when there is no aggregated output."""
+    anomalies, forecasts, versions = load_inputs()
+    if anomalies is None:
+        print("❌ No aggregated data to chart")
+        return None
+    series = build_series(anomalies, forecasts)
+    index = load_index()
+    charts = index["charts"]
+    todo = []
+    hashes = {}
+    for (country, disease), payload in series.items():
+        key = chart_key(country, disease)
+        hashes[key] = (country, disease, series_hash(payload))
+        entry = charts.get(key)
+        if force or entry is None or entry["hash"] != hashes[key][2]:
+            todo.append((key, country, disease, payload))
+    print(f"Charts: {len(series)} series, {len(todo)} to draw, {len(series) - len(todo)} unchanged")
+
+    batches = [todo[i:i + BATCH_SIZE] for i in range(0, len(todo), BATCH_SIZE)]
+    rendered = render_all(batches, workers, context, margin_ms)
+    now = datetime.now(tz=timz.utc).isoformat(timespec="seconds")
+    for key in rendered:
+        country, disease, digest = hashes[key]
+        charts[key] = {"country": country, "disease": disease, "hash": digest, "updated": now}
+
+    # Charts of series that left the data are removed with their objects
+    removed = sorted(set(charts) - set(hashes))
+    for start in range(0, len(removed), 1000):
+        s3.delete_objects(Bucket=S3_BUCKET, Delete={"Objects": [{"Key": key} for key in removed[start:start + 1000]]})
+    for key in removed:
+        del charts[key]
+    index.update({"render_version": RENDER_VERSION, "sources": versions, "updated": now})
+    with span("write_index"):
+        put_text(S3_BUCKET, INDEX_KEY, json.dumps(index, indent=2, sort_keys=True))
+    summary = {"total": len(series), "rendered": len(rendered), "unchanged": len(series) - len(todo),
+               "removed": len(removed), "remaining": len(todo) - len(rendered)}
+    print(f"✅ Charts: {summary['rendered']} drawn, {summary['unchanged']} unchanged, "
+          f"{summary['removed']} removed, {summary['remaining']} left for the next run → s3://{S3_BUCKET}/{INDEX_KEY}")
+    return summary
+
+#Lambda handler
+#Event keys (all optional): force=True to redraw every chart, workers for the process
+#pool size (default CHART_WORKERS or the CPU count). A 202 response with resume=True
+#means the time budget ran out: invoke again to draw the remaining charts.
+@traced_handler("charts")
+def lambda_handler(event=None, context=None):
+    event = event or {}
+    print("🚀 Starting chart rendering...")
+    summary = render_charts(force=event.get("force", False), workers=int(event.get("workers", MAX_WORKERS)),
+                            context=context, margin_ms=int(event.get("safety_margin_ms", SAFETY_MARGIN_MS)))
+    if summary is None:
+        return {
+            "statusCode": 404,
+            "body": "❌ Aggregated data for charts not found"
+        }
+    if summary["remaining"]:
+        return {
+            "statusCode": 202,
+            "body": f"⏸️ {summary['remaining']} charts left — invoke again to continue",
+            "resume": True
+        }
+    return {
+        "statusCode": 200,
+        "body": json.dumps(summary)
+    }
+
+if __name__ == "__main__":
+    print(lambda_handler())
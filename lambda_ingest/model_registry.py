@@ -0,0 +1,142 @@
+#File to keep a lightweight registry of fitted forecast models.
+#For each series it stores the fitted parameters and metadata of the last run so
+#the next run can warm start SARIMAX and forecasts can be reproduced without refitting.
+import json
+import time
+import numpy as np
+
+# Registry config
+REGISTRY_KEY = "registry/forecast/model_registry.json"
+REGISTRY_VERSION = 1
+
+#Function to build the registry id of a series.
+def series_id(country, disease):
+    return f"{country}|{disease}"
+
+#Function to collect versions of the model libraries used for fitting.
+def library_versions():
+    versions = {}
+    for name in ("statsmodels", "sklearn", "xgboost"):
+        try:
+            versions[name] = __import__(name).__version__
+        except Exception:
+            versions[name] = None
+    return versions
+
+class ModelRegistry:
+    """Per-series fitted parameters and metadata stored as one JSON object on S3."""
+
+    def __init__(self, s3, bucket, key=REGISTRY_KEY):
+        self.s3 = s3
+        self.bucket = bucket
+        self.key = key
+        self.records = {}
+        self.updated = set()
+        self.versions = library_versions()
+
+    def load(self):
+        """Read the registry from S3; start empty if missing or from another version."""
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self.key)
+            payload = json.loads(obj["Body"].read())
+            if payload.get("version") == REGISTRY_VERSION:
+                self.records = payload.get("records", {})
+        except Exception:
+            print("ℹ️ No model registry found — starting empty.")
+            self.records = {}
+        return self
+
+    def get(self, sid):
+        return self.records.get(sid)
+
+    def start_params(self, sid, model="ARIMA"):
+        """Return the stored fitted params of a model to warm start the next fit."""
+        record = self.records.get(sid)
+        if record is None:
+            return None
+        params = record.get("params", {}).get(model)
+        return np.asarray(params) if params is not None else None
+
+    def register(self, sid, ts, result, order):
+        self.records[sid] = {
+            "model": result["model"],
+            "order": list(order),
+            "score": result["score"],
+            "train_start": int(ts["year"].min()),
+            "train_end": int(ts["year"].max()),
+            "n_obs": int(len(ts)),
+            "params": result.get("params", {}),
+            "years": result["years"],
+            "forecast": result["forecast"],
+            "library_versions": self.versions,
+            "updated": int(time.time())
+        }
+        self.updated.add(sid)
+
+    def query(self, model=None, country=None, disease=None):
+        """List registry records filtered by chosen model, country or disease."""
+        found = []
+        for sid, record in self.records.items():
+            rec_country, rec_disease = sid.split("|", 1)
+            if model is not None and record["model"] != model:
+                continue
+            if country is not None and rec_country != country:
+                continue
+            if disease is not None and rec_disease != disease:
+                continue
+            found.append(dict(record, series=sid))
+        return found
+
+    def save(self):
+        body = json.dumps({"version": REGISTRY_VERSION, "records": self.records})
+        self.s3.put_object(Bucket=self.bucket, Key=self.key, Body=body)
+
+    def partial_key(self, shard_index):
+        return self.key.replace(".json", f"_shard_{shard_index:04d}.json")
+
+    def save_partial(self, shard_index):
+        """Write only the records this shard refitted, for the reducer to merge."""
+        records = {sid: self.records[sid] for sid in self.updated}
+        # Keep what earlier invocations of this shard already wrote (resumed runs)
+        try:
+            obj = self.s3.get_object(Bucket=self.bucket, Key=self.partial_key(shard_index))
+            records = dict(json.loads(obj["Body"].read()).get("records", {}), **records)
+        except Exception:
+            pass
+        body = json.dumps({"version": REGISTRY_VERSION, "records": records})
+        self.s3.put_object(Bucket=self.bucket, Key=self.partial_key(shard_index), Body=body)
+
+    def merge_partials(self, shard_count):
+        """Fold every shard's partial registry into this registry and delete the partials."""
+        for shard_index in range(shard_count):
+            key = self.partial_key(shard_index)
+            try:
+                obj = self.s3.get_object(Bucket=self.bucket, Key=key)
+            except Exception:
+                continue
+            self.records.update(json.loads(obj["Body"].read()).get("records", {}))
+            self.s3.delete_object(Bucket=self.bucket, Key=key)
+
+#Function to rebuild a forecast from stored params without running any optimizer.
+def reproduce_forecast(record, y, steps=5):
+    """Recompute the forecast of the registered model on the training values y."""
+    params = record["params"].get(record["model"])
+    if params is None:
+        return np.asarray(record["forecast"])
+    if record["model"] == "ARIMA":
+        from statsmodels.tsa.api import SARIMAX
+        model = SARIMAX(y, order=tuple(record["order"]), seasonal_order=(0, 0, 0, 0))
+        return model.filter(np.asarray(params)).forecast(steps=steps)
+    if record["model"] == "LinearRegression":
+        future = np.arange(record["train_end"] + 1, record["train_end"] + steps + 1)
+        return params["intercept"] + params["coef"] * future
+    if record["model"] == "ETS":
+        from statsmodels.tsa.api import ExponentialSmoothing
+        ets = ExponentialSmoothing(y, trend='add', seasonal=None,
+                                   initialization_method="known",
+                                   initial_level=params["initial_level"],
+                                   initial_trend=params["initial_trend"])
+        fit = ets.fit(smoothing_level=params["smoothing_level"],
+                      smoothing_trend=params["smoothing_trend"], optimized=False)
+        return fit.forecast(steps)
+    return np.asarray(record["forecast"])
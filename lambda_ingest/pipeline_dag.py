@@ -0,0 +1,201 @@
+#File to run the pipeline stages locally as a DAG.
+#Every stage declares its inputs and outputs; a stage depends on the stages that
+#produce its inputs, independent stages run concurrently, and a stage is skipped when
+#the fingerprints of its inputs and code match its last successful run.
+#Inputs/outputs are "dataset:<name>" (catalog manifest hash), "prefix:<s3 prefix>"
+#(keys + ETags under the prefix) or "key:<s3 key>" (ETag).
+#Usage: python lambda_ingest/pipeline_dag.py [--force all|eda,forecast] [--workers 4]
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from datetime import timezone as timz
+from s3_access import get_client, put_text
+from dataset_catalog import latest
+
+# DAG config
+S3_BUCKET = "vacc-disease-mlops-pipeline-argh"
+STATE_KEY = "state/pipeline/dag_state.json"
+REPORT_PREFIX = "logs/pipeline/"
+LAMBDA_DIR = os.path.dirname(os.path.abspath(__file__))
+MAX_WORKERS = 4
+# Read/publish path every stage runs through; part of every stage's code fingerprint
+IO_MODULES = ["tracing", "s3_access", "s3_cache", "dataset_catalog"]
+
+class Stage:
+    """One pipeline step: a callable plus the inputs it reads and the outputs it writes."""
+
+    def __init__(self, name, run, inputs=(), outputs=(), code=()):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.code = list(code)
+
+#Function to fingerprint one input or output reference; None when it does not exist.
+def fingerprint(ref, bucket=S3_BUCKET):
+    kind, name = ref.split(":", 1)
+    s3 = get_client()
+    if kind == "dataset":
+        entry = latest(bucket, name)
+        return entry["sha256"] if entry else None
+    if kind == "key":
+        try:
+            return s3.head_object(Bucket=bucket, Key=name)["ETag"]
+        except s3.exceptions.ClientError:
+            return None
+    if kind == "prefix":
+        digest = hashlib.sha256()
+        found = False
+        for page in s3.get_paginator("list_objects_v2").paginate(Bucket=bucket, Prefix=name):
+            for obj in page.get("Contents", []):
+                digest.update(f"{obj['Key']}={obj['ETag']}\n".encode())
+                found = True
+        return digest.hexdigest() if found else None
+    raise ValueError(f"Unknown reference kind: {ref}")
+
+#Function to hash the source of the modules a stage runs, so code changes rerun it.
+def code_fingerprint(modules):
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(os.path.join(LAMBDA_DIR, f"{module}.py"), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+#Function to map every stage to the stages producing its inputs.
+def dependencies(stages):
+    producers = {ref: stage.name for stage in stages for ref in stage.outputs}
+    return {stage.name: {producers[ref] for ref in stage.inputs if ref in producers} for stage in stages}
+
+#Function to run one stage, or skip it when nothing it depends on has changed.
+def run_stage(stage, previous, force):
+    started = time.perf_counter()
+    inputs = {ref: fingerprint(ref) for ref in stage.inputs}
+    inputs["code"] = code_fingerprint(stage.code)
+    missing = [ref for ref, value in inputs.items() if value is None]
+    if missing:
+        return {"status": "failed", "reason": f"missing input {', '.join(missing)}",
+                "seconds": time.perf_counter() - started}
+    outputs_exist = all(fingerprint(ref) is not None for ref in stage.outputs)
+    if not force and previous.get("inputs") == inputs and outputs_exist:
+        return {"status": "skipped", "reason": "inputs unchanged", "inputs": inputs,
+                "seconds": time.perf_counter() - started}
+    try:
+        stage.run()
+        missing = [ref for ref in stage.outputs if fingerprint(ref) is None]
+        if missing:
+            raise RuntimeError(f"missing output {', '.join(missing)}")
+    except Exception as e:
+        return {"status": "failed", "reason": f"{type(e).__name__}: {e}",
+                "seconds": time.perf_counter() - started}
+    reason = "forced" if force else ("inputs changed" if previous else "no previous run")
+    return {"status": "ran", "reason": reason, "inputs": inputs, "seconds": time.perf_counter() - started}
+
+#Main method to run the stages in dependency order, independent ones concurrently.
+def run_dag(stages, force=(), workers=MAX_WORKERS, bucket=S3_BUCKET):
+    """Return {stage: {status, reason, seconds}} with status ran, skipped, failed or blocked."""
+    s3 = get_client()
+    try:
+        state = json.loads(s3.get_object(Bucket=bucket, Key=STATE_KEY)["Body"].read())
+    except s3.exceptions.NoSuchKey:
+        state = {}
+    deps = dependencies(stages)
+    by_name = {stage.name: stage for stage in stages}
+    report = {}
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while len(report) < len(stages):
+            blocked = 0
+            for name, stage in by_name.items():
+                if name in report or name in running.values():
+                    continue
+                upstream = [report.get(dep, {}).get("status") for dep in deps[name]]
+                if any(status in ("failed", "blocked") for status in upstream):
+                    report[name] = {"status": "blocked", "reason": "upstream failed", "seconds": 0.0}
+                    blocked += 1
+                elif all(status in ("ran", "skipped") for status in upstream):
+                    forced = "all" in force or name in force
+                    running[pool.submit(run_stage, stage, state.get(name, {}), forced)] = name
+            if not running:
+                if not blocked and len(report) < len(stages):
+                    raise ValueError(f"Stages wait on each other: {sorted(set(by_name) - set(report))}")
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                report[name] = future.result()
+                print(f"{'⏭️' if report[name]['status'] == 'skipped' else '🏁'} {name}: "
+                      f"{report[name]['status']} ({report[name]['reason']})")
+
+    # Only successful stages update the state, so failures rerun next time
+    for name, result in report.items():
+        if result["status"] in ("ran", "skipped"):
+            state[name] = {"inputs": result.pop("inputs"),
+                           "finished": datetime.now(tz=timz.utc).isoformat(timespec="seconds")}
+    s3.put_object(Bucket=bucket, Key=STATE_KEY, Body=json.dumps(state, indent=2))
+    return {name: report[name] for name in by_name}
+
+#Function to print the per-stage report and upload it to the logs folder.
+def save_report(report, bucket=S3_BUCKET):
+    print(f"\n{'stage':20s} {'status':8s} {'seconds':>8s}  reason")
+    for name, result in report.items():
+        print(f"{name:20s} {result['status']:8s} {result['seconds']:8.2f}  {result['reason']}")
+    key = f"{REPORT_PREFIX}dag_run_{datetime.now(tz=timz.utc).strftime('%Y%m%dT%H%M%S')}.json"
+    put_text(bucket, key, json.dumps(report, indent=2))
+    print(f"📘 DAG report uploaded to S3 → {key}")
+
+def clean_category(category):
+    import lambda_clean_handler as clean
+    if clean.process_category(category) is None:
+        raise RuntimeError(f"no raw {category} files")
+
+def run_eda():
+    import lambda_eda_vacc_disease_data as eda
+    if eda.eda_analysis_data() is None:
+        raise RuntimeError("EDA produced no data")
+
+#Function to run a stage through its Lambda handler and fail on a non-200 response.
+def run_handler(module):
+    response = __import__(module).lambda_handler({}, None)
+    if response.get("statusCode") != 200:
+        raise RuntimeError(response.get("body"))
+
+# Pipeline definition; ingestion calls the WHO API and stays outside the DAG
+STAGES = [
+    Stage("clean_vaccination", lambda: clean_category("vaccination"),
+          inputs=["prefix:raw/vaccination/", "key:country_codes/country_codes.csv"],
+          outputs=["dataset:processed_vaccination"],
+          code=["lambda_clean_handler", "schemas", "validation", "indicators"] + IO_MODULES),
+    Stage("clean_disease", lambda: clean_category("disease"),
+          inputs=["prefix:raw/disease/", "key:country_codes/country_codes.csv"],
+          outputs=["dataset:processed_disease"],
+          code=["lambda_clean_handler", "schemas", "validation", "indicators"] + IO_MODULES),
+    Stage("eda", run_eda,
+          inputs=["dataset:processed_vaccination", "dataset:processed_disease",
+                  "key:country_codes/country_codes.csv"],
+          outputs=["dataset:cleaned_for_forecast"],
+          code=["lambda_eda_vacc_disease_data", "schemas", "validation", "indicators"] + IO_MODULES),
+    Stage("aggregate", lambda: run_handler("lambda_aggregate_and_flag_anomalies"),
+          inputs=["dataset:cleaned_for_forecast"], outputs=["dataset:grouped_combined_data"],
+          code=["lambda_aggregate_and_flag_anomalies", "schemas"] + IO_MODULES),
+    Stage("forecast", lambda: run_handler("lambda_forecast_disease_trends"),
+          inputs=["dataset:cleaned_for_forecast"], outputs=["dataset:forecasted_data"],
+          code=["lambda_forecast_disease_trends", "forecast_backtest", "global_forecaster", "forecast_cache",
+                "model_registry", "forecast_shards", "forecast_checkpoint", "fit_metrics", "schemas"] + IO_MODULES),
+    Stage("reconcile", lambda: run_handler("lambda_reconcile_forecasts"),
+          inputs=["dataset:forecasted_data", "dataset:cleaned_for_forecast"],
+          outputs=["dataset:reconciled_forecasts"], code=["lambda_reconcile_forecasts", "schemas"] + IO_MODULES),
+    Stage("charts", lambda: run_handler("lambda_render_charts"),
+          inputs=["dataset:grouped_combined_data", "dataset:forecasted_data"], outputs=["key:charts/index.json"],
+          code=["lambda_render_charts", "forecast_checkpoint", "schemas"] + IO_MODULES),
+]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the pipeline stages as a memoized DAG.")
+    parser.add_argument("--force", default="", help="'all' or comma-separated stages to rerun")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+    save_report(run_dag(STAGES, force=set(filter(None, args.force.split(","))), workers=args.workers))
@@ -0,0 +1,137 @@
+#File with the shared S3 access used by every pipeline stage.
+#One tuned client per container (connection pool, adaptive retries, keep-alive),
+#managed multipart/parallel transfers for large objects, and CSV reads that stream
+#straight into pandas instead of buffering the whole body first.
+#With the local cache on (S3_CACHE_DIR or s3_cache.enable()) reads go through it.
+import hashlib
+import os
+import tempfile
+import boto3
+import pandas as pd
+from botocore.config import Config
+from boto3.s3.transfer import TransferConfig
+from tracing import annotate
+import s3_cache
+
+# Client and transfer config
+MAX_POOL_CONNECTIONS = int(os.environ.get("S3_MAX_POOL_CONNECTIONS", "32"))
+MAX_ATTEMPTS = int(os.environ.get("S3_MAX_ATTEMPTS", "10"))
+# Below the threshold one PUT/GET beats multipart; above it parts move in parallel
+MULTIPART_THRESHOLD = 64 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 16 * 1024 * 1024
+MAX_CONCURRENCY = 8
+# Spool writes in memory up to this size before using a temp file
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+# Rows serialized per to_csv call when writing a DataFrame (a few MB of CSV)
+CSV_CHUNK_ROWS = 100000
+
+CLIENT_CONFIG = Config(
+    max_pool_connections=MAX_POOL_CONNECTIONS,
+    retries={"mode": "adaptive", "max_attempts": MAX_ATTEMPTS},
+    tcp_keepalive=True,
+)
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_THRESHOLD,
+    multipart_chunksize=MULTIPART_CHUNKSIZE,
+    max_concurrency=MAX_CONCURRENCY,
+    use_threads=True,
+)
+
+_client = None
+
+#Function to get the container-wide S3 client, created on first use.
+def get_client():
+    global _client
+    if _client is None:
+        _client = boto3.client("s3", config=CLIENT_CONFIG)
+    return _client
+
+#Function to list every key under a prefix, following pagination.
+def list_keys(bucket, prefix):
+    keys = []
+    paginator = get_client().get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        keys += [obj["Key"] for obj in page.get("Contents", [])]
+    return keys
+
+#Main method to read a CSV object into a DataFrame.
+def read_csv(bucket, key, **kwargs):
+    """Stream small objects into pandas; fetch large ones with parallel ranged GETs."""
+    client = get_client()
+    if s3_cache.enabled():
+        with s3_cache.open_cached(client, bucket, key) as f:
+            return pd.read_csv(f, **kwargs)
+    obj = client.get_object(Bucket=bucket, Key=key)
+    size = obj.get("ContentLength", 0)
+    annotate(bytes_in=size)
+    if size < MULTIPART_THRESHOLD:
+        return pd.read_csv(obj["Body"], **kwargs)
+    obj["Body"].close()
+    with tempfile.TemporaryFile() as f:
+        client.download_fileobj(bucket, key, f, Config=TRANSFER_CONFIG)
+        f.seek(0)
+        return pd.read_csv(f, **kwargs)
+
+#Function to read a whole (small) object as bytes.
+def read_bytes(bucket, key):
+    if s3_cache.enabled():
+        with s3_cache.open_cached(get_client(), bucket, key) as f:
+            return f.read()
+    obj = get_client().get_object(Bucket=bucket, Key=key)
+    annotate(bytes_in=obj.get("ContentLength"))
+    return obj["Body"].read()
+
+#Function to iterate over a CSV object in row batches without downloading it first.
+def read_csv_chunks(bucket, key, **kwargs):
+    """Return a pandas reader over the streamed body; use get_chunk(n) or iterate with chunksize."""
+    kwargs.setdefault("iterator", True)
+    if s3_cache.enabled():
+        # pandas opens (and closes) the cached file itself
+        return pd.read_csv(s3_cache.fetch(get_client(), bucket, key), **kwargs)
+    obj = get_client().get_object(Bucket=bucket, Key=key)
+    annotate(bytes_in=obj.get("ContentLength"))
+    return pd.read_csv(obj["Body"], **kwargs)
+
+#Function to upload size bytes of an open binary file from its current position.
+def _upload(f, bucket, key, size):
+    client = get_client()
+    if size < MULTIPART_THRESHOLD:
+        client.put_object(Bucket=bucket, Key=key, Body=f)
+    else:
+        client.upload_fileobj(f, bucket, key, Config=TRANSFER_CONFIG)
+    annotate(bytes_out=size)
+
+#Function to upload an open binary file from its current position; returns (size, sha256).
+def write_file(f, bucket, key):
+    start = f.tell()
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+        digest.update(chunk)
+    size = f.tell() - start
+    f.seek(start)
+    _upload(f, bucket, key, size)
+    return size, digest.hexdigest()
+
+#Main method to write a DataFrame as CSV.
+def write_csv(df, bucket, key, **kwargs):
+    """Serialize to a spooled file, upload it and return (size, sha256 of the CSV bytes)."""
+    kwargs.setdefault("index", False)
+    header = kwargs.pop("header", True)
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE, mode="w+b") as f:
+        # Row chunks serialized to str (faster than to_csv into a binary file) and hashed
+        # on the way in, so the bytes are only read again by the upload
+        for start in range(0, max(len(df), 1), CSV_CHUNK_ROWS):
+            chunk = df.iloc[start:start + CSV_CHUNK_ROWS].to_csv(header=header if start == 0 else False, **kwargs)
+            chunk = chunk.encode("utf-8")
+            digest.update(chunk)
+            size += f.write(chunk)
+        f.seek(0)
+        _upload(f, bucket, key, size)
+    return size, digest.hexdigest()
+
+#Function to write a small text or bytes object (JSON logs, manifests).
+def put_text(bucket, key, body):
+    get_client().put_object(Bucket=bucket, Key=key, Body=body)
+    annotate(bytes_out=len(body))
@@ -0,0 +1,187 @@
+#File with the local read-through cache of S3 objects for the scripts and local runs.
+#Each object is stored once per (bucket, key, ETag) under the cache directory. A repeat
+#read is a conditional GET that S3 answers with 304 Not Modified, so no body is
+#transferred, and the file is read from local disk. Files are written to a temp file
+#and renamed into place, so concurrent processes never see a partial file, and
+#eviction (least recently used first, down to S3_CACHE_MAX_MB) runs under a file lock
+#where fcntl is available (without it concurrent evictions are not serialized).
+#Off unless S3_CACHE_DIR is set or enable() is called; s3_access reads through it then.
+#Layout: {dir}/objects/{address[:2]}/{address} and {dir}/index/{sha256(bucket/key)}.json
+import atexit
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import numpy as np
+from botocore.exceptions import ClientError
+from tracing import annotate
+
+try:
+    import fcntl
+except ImportError:  # not available outside Unix
+    fcntl = None
+
+# Cache config
+CACHE_DIR = os.environ.get("S3_CACHE_DIR", "")
+DEFAULT_DIR = os.path.join(os.path.expanduser("~"), ".cache", "vacc-disease-mlops", "s3")
+CACHE_MAX_MB = float(os.environ.get("S3_CACHE_MAX_MB", "2048"))
+# Use cached objects without the conditional GET (keys known not to change, e.g. dated versions)
+CACHE_OFFLINE = os.environ.get("S3_CACHE_OFFLINE") == "1"
+CHUNK_SIZE = 1024 * 1024
+# Columnar formats read_columnar can memory-map (pyarrow ones need pip install pyarrow)
+COLUMNAR_SUFFIXES = (".npy", ".parquet", ".feather", ".arrow")
+
+_cache_dir = CACHE_DIR or None
+_max_bytes = CACHE_MAX_MB * 1024 * 1024
+stats = {"hits": 0, "misses": 0, "bytes_read": 0, "bytes_downloaded": 0, "evicted": 0}
+
+#Function to turn the cache on (directory and size limit default to the env config).
+def enable(directory=None, max_mb=None):
+    global _cache_dir, _max_bytes
+    first = _cache_dir is None
+    _cache_dir = directory or CACHE_DIR or DEFAULT_DIR
+    _max_bytes = (max_mb if max_mb is not None else CACHE_MAX_MB) * 1024 * 1024
+    os.makedirs(os.path.join(_cache_dir, "objects"), exist_ok=True)
+    os.makedirs(os.path.join(_cache_dir, "index"), exist_ok=True)
+    if first:
+        atexit.register(print_stats)
+    return _cache_dir
+
+def enabled():
+    return _cache_dir is not None
+
+#Function to get the content address of one object version.
+def address(bucket, key, etag):
+    return hashlib.sha256(f"{bucket}/{key}/{etag}".encode("utf-8")).hexdigest()
+
+def object_path(addr):
+    return os.path.join(_cache_dir, "objects", addr[:2], addr)
+
+def index_path(bucket, key):
+    return os.path.join(_cache_dir, "index", hashlib.sha256(f"{bucket}/{key}".encode("utf-8")).hexdigest() + ".json")
+
+#Function to write a file atomically: a temp file in the same directory renamed over the target.
+def write_atomic(path, chunks):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return size
+
+def _read_index(bucket, key):
+    try:
+        with open(index_path(bucket, key)) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+#Function to get the cached file of an entry if it is still there, marking it as just used.
+def _touch(entry):
+    path = object_path(entry["address"])
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        return None
+    return path
+
+#Main method to get the local path of an S3 object, downloading it on a miss.
+def fetch(client, bucket, key):
+    """Return the path of the cached copy of s3://bucket/key, up to date with its ETag."""
+    entry = _read_index(bucket, key)
+    path = _touch(entry) if entry else None
+    if path and CACHE_OFFLINE:
+        return _hit(path)
+    try:
+        kwargs = {"IfNoneMatch": entry["etag"]} if path else {}
+        obj = client.get_object(Bucket=bucket, Key=key, **kwargs)
+    except ClientError as e:
+        if path and e.response["Error"]["Code"] in ("304", "NotModified"):
+            return _hit(path)
+        raise
+    addr = address(bucket, key, obj["ETag"])
+    path = object_path(addr)
+    size = write_atomic(path, obj["Body"].iter_chunks(CHUNK_SIZE))
+    entry = {"bucket": bucket, "key": key, "etag": obj["ETag"], "address": addr, "bytes": size}
+    write_atomic(index_path(bucket, key), [json.dumps(entry).encode("utf-8")])
+    stats["misses"] += 1
+    stats["bytes_downloaded"] += size
+    annotate(bytes_in=size)
+    evict(keep=path)
+    return path
+
+def _hit(path):
+    stats["hits"] += 1
+    stats["bytes_read"] += os.path.getsize(path)
+    return path
+
+#Function to open the cached copy of an object for reading.
+def open_cached(client, bucket, key):
+    try:
+        return open(fetch(client, bucket, key), "rb")
+    except FileNotFoundError:
+        # Evicted by another process between the fetch and the open
+        return open(fetch(client, bucket, key), "rb")
+
+#Main method to keep the cache under its size limit, dropping the least recently used files.
+def evict(keep=None):
+    """keep is a file never dropped (the one just downloaded, even if it alone is over the limit)."""
+    objects = os.path.join(_cache_dir, "objects")
+    with open(os.path.join(_cache_dir, ".lock"), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        files = []
+        for root, _, names in os.walk(objects):
+            for name in names:
+                if name.startswith(".tmp-"):
+                    continue
+                try:
+                    st = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_mtime, st.st_size, os.path.join(root, name)))
+        total = sum(size for _, size, _ in files)
+        # Open readers keep their data: on POSIX a removed file lives until it is closed
+        for _, size, path in sorted(files):
+            if total <= _max_bytes:
+                break
+            if path == keep:
+                continue
+            os.remove(path)
+            total -= size
+            stats["evicted"] += 1
+    return total
+
+#Function to read a cached columnar file with its pages memory-mapped instead of copied.
+def read_columnar(client, bucket, key, columns=None, memory_map=True):
+    """.npy gives a read-only numpy memmap; .parquet/.feather/.arrow give a pandas DataFrame."""
+    if not key.endswith(COLUMNAR_SUFFIXES):
+        raise ValueError(f"Not a columnar file: {key} (expected one of {', '.join(COLUMNAR_SUFFIXES)})")
+    with open_cached(client, bucket, key) as f:
+        if key.endswith(".npy"):
+            return np.load(f.name, mmap_mode="r" if memory_map else None)
+        try:
+            import pyarrow as pa
+            import pyarrow.feather as feather
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(f"Reading {key} needs pyarrow (pip install pyarrow)")
+        source = pa.py_buffer(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)) if memory_map else f.read()
+        reader = pq.read_table if key.endswith(".parquet") else feather.read_table
+        return reader(pa.BufferReader(source), columns=columns).to_pandas()
+
+#Function to print the hits and misses of this process.
+def print_stats():
+    if not stats["hits"] + stats["misses"]:
+        return
+    print(f"🗄️ S3 cache: {stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['bytes_read'] / 1e6:.1f} MB from disk, {stats['bytes_downloaded'] / 1e6:.1f} MB downloaded, "
+          f"{stats['evicted']} evicted ({_cache_dir})")
@@ -0,0 +1,141 @@
+#File with the typed schema registry of the pipeline datasets.
+#Every dataset declares its columns once with compact dtypes (int16 years, float32
+#values, categoricals for codes and names); loaders apply the schema at read time
+#instead of letting pandas infer the types again at every stage.
+#Modes (env SCHEMA_MODE): "coerce" drops and reports the rows that do not fit the
+#schema, "strict" raises ValueError on the first dataset with such rows.
+import os
+import numpy as np
+import pandas as pd
+from tracing import annotate
+from s3_access import read_csv
+
+# Schema config
+SCHEMA_MODE = os.environ.get("SCHEMA_MODE", "coerce")
+# Rejected rows printed with the report
+SAMPLE_ROWS = 3
+INT16_RANGE = (np.iinfo(np.int16).min, np.iinfo(np.int16).max)
+FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+# Cleaned WHO records (processed_vaccination, processed_disease and the master files)
+PROCESSED = {
+    "columns": {"indicator": "category", "country": "category", "region": "category",
+                "year": "int16", "value": "float32", "disease_code": "category"},
+    "required": ["indicator", "country", "year", "value", "disease_code"],
+}
+# Records joined with country names for the forecast and aggregation stages
+CLEANED_FOR_FORECAST = {
+    "columns": {"indicator": "category", "country": "category", "region": "category",
+                "year": "int16", "value": "float32", "disease_name": "category",
+                "type": "category", "country_name": "category", "continent": "category"},
+    # Only what the forecast, aggregation and reconciliation stages read
+    "required": ["country", "year", "value", "disease_name", "type"],
+}
+
+SCHEMAS = {
+    "processed_vaccination": PROCESSED,
+    "processed_disease": PROCESSED,
+    "cleaned_for_forecast": CLEANED_FOR_FORECAST,
+    "country_codes": {
+        "columns": {"country": "category", "code_3": "category", "continent": "category"},
+        "required": ["code_3"],
+    },
+    # Served as JSON by forecast_query: float64 keeps values like 85.3 exact there
+    "grouped_combined_data": {
+        "columns": {"country_name": "category", "year": "int16", "type": "category",
+                    "disease_name": "category", "value": "float64", "region": "category",
+                    "continent": "category", "change_pct": "float64", "anomaly": "category"},
+        "required": ["country_name", "year", "type", "disease_name"],
+    },
+    "forecasted_data": {
+        "columns": {"country": "category", "disease": "category", "year": "int16",
+                    "forecast": "float64", "model": "category", "score": "float64"},
+        "required": ["country", "disease", "year", "forecast"],
+    },
+    # ols and mint are only filled when those methods ran
+    "reconciled_forecasts": {
+        "columns": {"level": "category", "node": "category", "disease": "category", "year": "int16",
+                    "base": "float64", "bottom_up": "float64", "ols": "float64", "mint": "float64"},
+        "required": ["level", "node", "disease", "year", "bottom_up"],
+    },
+}
+
+#Function to get the schema of a dataset.
+def get_schema(dataset):
+    if dataset not in SCHEMAS:
+        raise ValueError(f"No schema registered for dataset {dataset}")
+    return SCHEMAS[dataset]
+
+#Function to measure the in-memory size of a DataFrame per row.
+def bytes_per_row(df):
+    return df.memory_usage(deep=True, index=False).sum() / max(1, len(df))
+
+#Function to convert one column to its schema dtype; returns (values, mask of rows that do not fit).
+def convert(column, dtype):
+    if dtype in ("category", "string"):
+        return column.astype(dtype), pd.Series(False, index=column.index)
+    values = pd.to_numeric(column, errors="coerce")
+    bad = values.isna() & column.notna()
+    if dtype == "int16":
+        bad |= values.notna() & ((values % 1 != 0) | (values < INT16_RANGE[0]) | (values > INT16_RANGE[1]))
+    elif dtype == "float32":
+        bad |= values.abs() > FLOAT32_MAX
+    return values.where(~bad), bad
+
+#Main method to apply a dataset schema to a DataFrame.
+def enforce(df, dataset, mode=None, report=True):
+    """Return (typed DataFrame with the schema columns in order, rejected rows with a reason column)."""
+    mode = mode or SCHEMA_MODE
+    schema = get_schema(dataset)
+    before = bytes_per_row(df)
+    reasons = pd.Series("", index=df.index, dtype=object)
+    typed = {}
+    for name, dtype in schema["columns"].items():
+        if name not in df.columns:
+            if mode == "strict":
+                raise ValueError(f"{dataset}: missing column {name}")
+            typed[name], _ = convert(pd.Series(np.nan, index=df.index), dtype)
+            continue
+        typed[name], bad = convert(df[name], dtype)
+        reasons[bad & (reasons == "")] = f"{name}: not {dtype}"
+    typed = pd.DataFrame(typed)
+    for name in schema["required"]:
+        reasons[typed[name].isna() & (reasons == "")] = f"{name}: missing"
+    keep = (reasons == "").to_numpy()
+    rejected = df[~keep].assign(reason=reasons[~keep])
+    if mode == "strict" and len(rejected):
+        raise ValueError(f"{dataset}: {len(rejected)} rows do not match the schema "
+                         f"({', '.join(rejected['reason'].unique()[:SAMPLE_ROWS])})")
+    if len(rejected):
+        typed = typed[keep]
+        for name in typed.select_dtypes("category").columns:
+            typed[name] = typed[name].cat.remove_unused_categories()
+    # Required columns hold no nulls anymore, so their ints can use the plain numpy dtype
+    for name, dtype in schema["columns"].items():
+        if dtype == "int16":
+            typed[name] = typed[name].astype("int16" if name in schema["required"] else "Int16")
+        elif dtype == "float32":
+            typed[name] = typed[name].astype("float32")
+    if report:
+        print_report(dataset, len(df), before, bytes_per_row(typed),
+                     rejected["reason"].value_counts().to_dict(), rejected.head(SAMPLE_ROWS))
+    annotate(rows_rejected=len(rejected), bytes_per_row=round(bytes_per_row(typed), 1))
+    return typed, rejected
+
+#Function to print the memory per row before and after typing, and the rejected rows by reason.
+def print_report(dataset, rows, before, after, counts, sample=None):
+    rejected = sum(counts.values())
+    print(f"📐 {dataset}: {rows} rows, {before:.1f} → {after:.1f} bytes/row "
+          f"({before / max(after, 1e-9):.1f}x), {rejected} rejected")
+    for reason, count in counts.items():
+        print(f"-> {count} rows with {reason}")
+    if rejected and sample is not None:
+        print(sample)
+
+#Main method to read a dataset CSV from S3 with its schema applied.
+def read_dataset(bucket, key, dataset, mode=None, **kwargs):
+    """Read only the schema columns, type them and report; rejected rows are dropped (coerce) or raise (strict)."""
+    columns = get_schema(dataset)["columns"]
+    kwargs.setdefault("usecols", lambda column: column in columns)
+    df, _ = enforce(read_csv(bucket, key, **kwargs), dataset, mode)
+    return df
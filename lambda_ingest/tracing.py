@@ -0,0 +1,159 @@
+#File to trace pipeline stages with timed spans.
+#Each span records wall and CPU time, rows in/out, bytes transferred and the peak
+#RSS high-water mark; the root span of a handler prints one JSON trace per invocation.
+#Tracing is off unless PIPELINE_TRACE=1 (or enable() is called); when off, traced
+#functions cost one flag check. Span nesting is tracked per thread, so stages that run
+#concurrently each get their own parent chain, and every handler invocation collects its
+#spans in its own list (a context variable), so concurrent handlers never mix traces.
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+
+try:
+    import resource
+except ImportError:  # not available outside Unix
+    resource = None
+
+ENABLED = os.environ.get("PIPELINE_TRACE", "0") == "1"
+_local = threading.local()
+# Spans of the running handler invocation, and the parent of the first span of a worker thread
+_trace = contextvars.ContextVar("trace", default=None)
+_parent = contextvars.ContextVar("trace_parent", default=None)
+
+def enable(flag=True):
+    global ENABLED
+    ENABLED = flag
+
+#Function to get the open spans of the current thread, innermost last.
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+#Function to read the process RSS high-water mark in MB (ru_maxrss is KB on Linux).
+def peak_rss_mb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+#Function to count rows of a DataFrame, or of the first item of a tuple result.
+def count_rows(value):
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    if hasattr(value, "shape") and hasattr(value, "columns"):
+        return int(value.shape[0])
+    return None
+
+class Span:
+    """One timed section; nested spans keep a reference to their parent."""
+
+    def __init__(self, name):
+        self.name = name
+        self.id = uuid.uuid4().hex[:8]
+        stack = _stack()
+        self.parent = stack[-1].id if stack else _parent.get()
+        self.attrs = {}
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        _stack().append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _stack().pop()
+        record = {
+            "name": self.name,
+            "id": self.id,
+            "parent": self.parent,
+            "wall_ms": round((time.perf_counter() - self.wall) * 1000, 3),
+            "cpu_ms": round((time.process_time() - self.cpu) * 1000, 3),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        record.update(self.attrs)
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        spans = _trace.get()
+        if spans is not None:
+            spans.append(record)
+        return False
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+#Function to open a span around a block of code.
+def span(name):
+    return Span(name) if ENABLED else _NO_SPAN
+
+#Function to attach attributes (e.g. bytes_in, bytes_out) to the innermost span.
+def annotate(**attrs):
+    stack = _stack() if ENABLED else None
+    if stack:
+        stack[-1].attrs.update({k: v for k, v in attrs.items() if v is not None})
+
+#Decorator to trace a function, recording rows in (first DataFrame arg) and rows out.
+def traced(name=None):
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with Span(span_name) as current:
+                rows_in = next((r for r in map(count_rows, args) if r is not None), None)
+                result = func(*args, **kwargs)
+                rows = {"rows_in": rows_in, "rows_out": count_rows(result)}
+                for key, value in rows.items():
+                    if value is not None:
+                        current.attrs.setdefault(key, value)
+                return result
+        return wrapper
+    return decorator
+
+#Decorator for Lambda handlers: the root span of an invocation that prints the trace.
+def traced_handler(stage):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            spans = []
+            token = _trace.set(spans)
+            invocation = uuid.uuid4().hex
+            try:
+                with Span(stage):
+                    return func(*args, **kwargs)
+            finally:
+                _trace.reset(token)
+                print(json.dumps({"trace": stage, "invocation": invocation, "spans": spans}, default=str))
+        return wrapper
+    return decorator
+
+#Function to wrap a function run in worker threads so its spans join the caller's trace.
+def in_trace(func):
+    if not ENABLED:
+        return func
+    spans = _trace.get()
+    stack = _stack()
+    parent = stack[-1].id if stack else _parent.get()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        tokens = _trace.set(spans), _parent.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _parent.reset(tokens[1])
+            _trace.reset(tokens[0])
+    return wrapper
@@ -0,0 +1,150 @@
+#File with the declarative validation rules of the WHO records.
+#Every rule is a vectorized check of one column. A batch is validated in one pass that
+#fills a rows x rules mask, so no row is looked at in Python. Failing rows are not
+#dropped silently: they keep the ids of the rules they break and go, with the schema
+#rejects and their reason (schemas.enforce), to a quarantine dataset.
+#Rules (env VALIDATION_RULES, comma separated ids; default all):
+#  year_range       year within [VALID_YEAR_MIN, current year]
+#  non_negative     value >= 0
+#  coverage_max     value <= 100 for the vaccination coverage indicators
+#  known_iso3       country is a code_3 of country_codes (WHO regions, income groups, GLOBAL are not)
+#  known_indicator  indicator is one of the ingested GHO indicators
+import os
+from datetime import datetime
+from datetime import timezone as timz
+import numpy as np
+import pandas as pd
+from tracing import annotate
+from s3_access import get_client, read_csv
+from dataset_catalog import publish, data_key
+from schemas import get_schema
+from indicators import VACCINE_INDICATORS, DISEASE_INDICATORS
+
+# Validation config
+VALID_YEAR_MIN = int(os.environ.get("VALID_YEAR_MIN", "1950"))
+CURRENT_YEAR = datetime.now(tz=timz.utc).year
+COUNTRY_CODES_KEY = "country_codes/country_codes.csv"
+QUARANTINE_PREFIX = "quarantine/"
+KNOWN_INDICATORS = os.environ.get("VALID_INDICATORS", ",".join(
+    list(VACCINE_INDICATORS.values()) + list(DISEASE_INDICATORS.values()))).split(",")
+# Vaccination indicators report coverage in percent
+COVERAGE_INDICATORS = list(VACCINE_INDICATORS.values())
+
+# "known" checks the column against a reference set, "min"/"max" bound it, "when"
+# limits the rule to the rows whose column is in a reference set
+RULES = [
+    {"id": "year_range", "column": "year", "min": VALID_YEAR_MIN, "max": CURRENT_YEAR},
+    {"id": "non_negative", "column": "value", "min": 0},
+    {"id": "coverage_max", "column": "value", "max": 100, "when": ("indicator", "coverage_indicators")},
+    {"id": "known_iso3", "column": "country", "known": "iso3"},
+    {"id": "known_indicator", "column": "indicator", "known": "indicators"},
+]
+ACTIVE_RULES = os.environ.get("VALIDATION_RULES", ",".join(rule["id"] for rule in RULES)).split(",")
+
+# Reference sets per bucket, kept across warm invocations
+_references = {}
+
+#Function to load the reference sets the rules check against.
+def load_references(bucket):
+    if bucket not in _references:
+        references = {"indicators": frozenset(KNOWN_INDICATORS),
+                      "coverage_indicators": frozenset(COVERAGE_INDICATORS)}
+        try:
+            # Codes as the country name merge sees them: a code it cannot join is unknown
+            codes = read_csv(bucket, COUNTRY_CODES_KEY, usecols=["code_3"], sep=",", on_bad_lines="skip")
+            references["iso3"] = frozenset(codes["code_3"].dropna())
+        except get_client().exceptions.NoSuchKey:
+            print(f"⚠️ {COUNTRY_CODES_KEY} not found, known_iso3 is not checked")
+        _references[bucket] = references
+    return _references[bucket]
+
+#Function to check which values of a column are in a set; categoricals are checked once per category.
+def isin(column, values, missing):
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        # Code -1 (missing) picks the last entry
+        lookup = np.append(column.cat.categories.isin(values), missing)
+        return lookup[column.cat.codes.to_numpy()]
+    return np.where(column.isna().to_numpy(), missing, column.isin(values).to_numpy())
+
+#Function to get the active rules whose column and reference sets the batch has.
+def applicable_rules(df, references, rules=None):
+    rules = ACTIVE_RULES if rules is None else rules
+    active = []
+    for rule in RULES:
+        column, reference = rule.get("when", (rule["column"], rule.get("known")))
+        if (rule["id"] in rules and {rule["column"], column} <= set(df.columns)
+                and {rule.get("known"), reference} - {None} <= set(references)):
+            active.append(rule)
+    return active
+
+#Function to evaluate one rule; returns the mask of the rows that break it.
+def rule_mask(df, rule, references):
+    column = df[rule["column"]]
+    # Missing values are the schema's job (required columns), not a rule failure
+    if "known" in rule:
+        return ~isin(column, references[rule["known"]], missing=True)
+    values = column.to_numpy(dtype="float64", na_value=np.nan)
+    bad = np.zeros(len(df), dtype=bool)
+    if "min" in rule:
+        bad |= values < rule["min"]
+    if "max" in rule:
+        bad |= values > rule["max"]
+    if "when" in rule:
+        name, reference = rule["when"]
+        bad &= isin(df[name], references[reference], missing=False)
+    return bad
+
+#Main method to validate a batch against the rules in one pass.
+def validate(df, references, rules=None):
+    """Return (valid rows, failing rows with a rules column of the ids they break, {rule id: failing rows})."""
+    active = applicable_rules(df, references, rules)
+    masks = np.zeros((len(df), len(active)), dtype=bool, order="F")
+    for i, rule in enumerate(active):
+        masks[:, i] = rule_mask(df, rule, references)
+    counts = dict(zip([rule["id"] for rule in active], masks.sum(axis=0).tolist()))
+    failing = masks.any(axis=1)
+    if not failing.any():
+        return df, df.iloc[:0].assign(rules=pd.Series(dtype=object)), counts
+    ids = np.full(failing.sum(), "", dtype=object)
+    for i, rule in enumerate(active):
+        ids = np.where(masks[failing, i], ids + rule["id"] + ";", ids)
+    quarantined = df[failing].assign(rules=pd.Series(ids, index=df.index[failing]).str.rstrip(";"))
+    valid = df[~failing].copy()
+    for name in valid.select_dtypes("category").columns:
+        valid[name] = valid[name].cat.remove_unused_categories()
+    return valid, quarantined, counts
+
+#Function to get the name of the quarantine dataset of a dataset.
+def quarantine_dataset(dataset):
+    return f"{dataset}_quarantine"
+
+#Function to get the quarantine columns: the dataset's, the failed rule ids and the schema reason.
+def quarantine_columns(dataset):
+    return list(get_schema(dataset)["columns"]) + ["rules", "reason"]
+
+#Function to put the rule failures and the schema rejects (when given) of a batch in one frame.
+def quarantine_frame(dataset, failing, rejected=None):
+    columns = quarantine_columns(dataset)
+    frames = [failing.assign(reason="")] + ([rejected.assign(rules="schema")] if rejected is not None else [])
+    frames = [frame.reindex(columns=columns).astype(object) for frame in frames if len(frame)]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+#Function to print the rows quarantined by each rule.
+def print_counts(dataset, rows, counts):
+    failing = sum(counts.values())
+    print(f"🧪 {dataset}: {rows} rows checked against {len(counts)} rules, {failing} rule failures")
+    for rule_id, count in counts.items():
+        if count:
+            print(f"-> {count} rows break {rule_id}")
+    annotate(**{f"rule_{rule_id}": count for rule_id, count in counts.items()})
+
+#Function to publish the quarantined rows of a dataset version (also when there are none,
+#so the latest quarantine always belongs to the latest version).
+def publish_quarantine(bucket, dataset, quarantined, version):
+    entry = publish(bucket, quarantine_dataset(dataset), quarantined, version, QUARANTINE_PREFIX)
+    annotate(rows_quarantined=len(quarantined))
+    return entry
+
+#Function to build the key of a quarantine version written in batches.
+def quarantine_key(dataset, version):
+    return data_key(QUARANTINE_PREFIX, quarantine_dataset(dataset), version)
@@ -1,11 +1,13 @@
-import pandas as pd
 import boto3
 from datetime import datetime
 import re
 from io import StringIO
 
+from download_file_from_s3 import enable_local_cache, read_csv
+
 # AWS config
 s3 = boto3.client("s3")
+enable_local_cache()
 S3_BUCKET = "vacc-disease-mlops-pipeline-argh"
 INPUT_PREFIX = "processed/forecasting/"
 OUTPUT_PREFIX = "aggregated/forecasting/"
@@ -19,8 +21,7 @@ def get_latest_file():
 
 def load_from_s3(key):
     """Download a CSV file from S3 into a DataFrame."""
-    response = s3.get_object(Bucket=S3_BUCKET, Key=key)
-    df = pd.read_csv(response['Body'])
+    df = read_csv(S3_BUCKET, key)
     return df
 
 def detect_anomalies(df):
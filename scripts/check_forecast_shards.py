@@ -0,0 +1,110 @@
+#Local check for the sharded forecast stage (fan-out/fan-in).
+#Starts a local moto S3 server (pip install "moto[server]"), runs the forecast
+#Lambda once unsharded and then as N parallel shard processes plus the reducer,
+#and checks that the merged output equals the single-shard output.
+#Usage: python scripts/check_forecast_shards.py [--shards 4] [--input cleaned.csv]
+import argparse
+import io
+import logging
+import os
+import subprocess
+import sys
+import time
+import boto3
+import numpy as np
+import pandas as pd
+from moto.server import ThreadedMotoServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAMBDA_DIR = os.path.join(ROOT, "lambda_ingest")
+S3_BUCKET = "vacc-disease-mlops-pipeline-argh"
+INPUT_KEY = "processed/forecasting/cleaned_for_forecast_20000101.csv"
+RUN_DATE = "20000101"
+PORT = 5123
+
+CHILD = """
+import json, sys
+sys.path.insert(0, {lambda_dir!r})
+import lambda_forecast_disease_trends as forecast
+print(json.dumps(forecast.lambda_handler({event!r})))
+"""
+
+#Function to build a small cleaned_for_forecast input when none is given.
+def synthetic_input(countries=12, years=range(2000, 2020), seed=7):
+    rng = np.random.default_rng(seed)
+    rows = []
+    for c in range(countries):
+        for disease in ("Measles", "Polio", "Diphtheria"):
+            base = rng.uniform(50, 500)
+            for year in years:
+                rows.append({"country": f"C{c:03d}", "disease_name": disease, "type": "Disease",
+                             "year": year, "value": base + rng.normal(0, 10) + (year - 2000) * 3})
+    return pd.DataFrame(rows)
+
+#Function to start one handler process with the given event.
+def start_handler(event, env):
+    code = CHILD.format(lambda_dir=LAMBDA_DIR, event=event)
+    return subprocess.Popen([sys.executable, "-c", code], env=env, cwd=ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+#Function to wait for handler processes and fail on errors.
+def wait_all(procs):
+    for proc in procs:
+        out, err = proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(err)
+        print(out.strip().splitlines()[-1])
+
+#Function to read the merged forecast output.
+def read_output(s3):
+    obj = s3.get_object(Bucket=S3_BUCKET, Key=f"processed/forecast/forecasted_data_{RUN_DATE}.csv")
+    return pd.read_csv(io.BytesIO(obj["Body"].read()))
+
+#Function to remove cache and registry state so both runs start cold.
+def reset_state(s3):
+    for key in ("cache/forecast/forecast_cache.json", "registry/forecast/model_registry.json"):
+        s3.delete_object(Bucket=S3_BUCKET, Key=key)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--input", help="local cleaned_for_forecast CSV (synthetic if omitted)")
+    args = parser.parse_args()
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    server = ThreadedMotoServer(port=PORT, verbose=False)
+    server.start()
+    env = dict(os.environ, AWS_ENDPOINT_URL_S3=f"http://127.0.0.1:{PORT}",
+               AWS_ACCESS_KEY_ID="testing", AWS_SECRET_ACCESS_KEY="testing",
+               AWS_DEFAULT_REGION="us-east-1")
+    os.environ.update(env)
+    try:
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=S3_BUCKET)
+        df = pd.read_csv(args.input) if args.input else synthetic_input()
+        s3.put_object(Bucket=S3_BUCKET, Key=INPUT_KEY, Body=df.to_csv(index=False))
+
+        # 1. Single-shard reference run
+        started = time.perf_counter()
+        wait_all([start_handler({"use_cache": False, "run_date": RUN_DATE}, env)])
+        single_s = time.perf_counter() - started
+        single = read_output(s3)
+        reset_state(s3)
+
+        # 2. Fan-out to N shard processes, then fan-in with the reducer
+        started = time.perf_counter()
+        wait_all([start_handler({"use_cache": False, "run_date": RUN_DATE,
+                                 "shard_index": i, "shard_count": args.shards}, env)
+                  for i in range(args.shards)])
+        wait_all([start_handler({"reduce": True, "shard_count": args.shards, "run_date": RUN_DATE}, env)])
+        sharded_s = time.perf_counter() - started
+        merged = read_output(s3)
+    finally:
+        server.stop()
+
+    pd.testing.assert_frame_equal(single, merged)
+    print(f"✅ Merged output of {args.shards} shards equals the single-shard run "
+          f"({len(merged)} rows; single {single_s:.1f}s, sharded {sharded_s:.1f}s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#Local check for the global forecast model on ragged input.
+#WHO data is ragged: not every country reports every disease. Runs the forecast
+#Lambda with global_model=True (and compare=True) in an in-process moto S3 bucket
+#(pip install moto) on input where some countries have only one disease, and checks
+#that exactly the series in the input are forecast, each for the full horizon.
+#Usage: python scripts/check_global_forecast.py [--input cleaned.csv]
+import argparse
+import io
+import os
+import sys
+import pandas as pd
+from moto import mock_aws
+from check_forecast_shards import synthetic_input, S3_BUCKET, INPUT_KEY, RUN_DATE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "lambda_ingest"))
+
+#Function to drop diseases from some countries so the (country, disease) pairs are ragged.
+def ragged_input(df):
+    countries = sorted(df["country"].unique())
+    diseases = sorted(df["disease_name"].unique())
+    # Every third country reports only its first disease, one more only the last
+    only = {country: diseases[:1] for country in countries[::3]}
+    only[countries[1]] = diseases[-1:]
+    keep = [disease in only.get(country, diseases) for country, disease in zip(df["country"], df["disease_name"])]
+    return df[keep].reset_index(drop=True)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", help="local cleaned_for_forecast CSV (synthetic if omitted)")
+    args = parser.parse_args()
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+    df = ragged_input(pd.read_csv(args.input) if args.input else synthetic_input())
+    with mock_aws():
+        import lambda_forecast_disease_trends as forecast
+        forecast.s3.create_bucket(Bucket=S3_BUCKET)
+        forecast.s3.put_object(Bucket=S3_BUCKET, Key=INPUT_KEY, Body=df.to_csv(index=False))
+        response = forecast.lambda_handler({"global_model": True, "compare": True, "run_date": RUN_DATE})
+        if response.get("statusCode") != 200:
+            raise RuntimeError(response)
+        obj = forecast.s3.get_object(Bucket=S3_BUCKET, Key=f"processed/forecast/forecasted_data_{RUN_DATE}.csv")
+        out = pd.read_csv(io.BytesIO(obj["Body"].read()))
+
+    expected = set(df.loc[df["type"] == "Disease", ["country", "disease_name"]].itertuples(index=False, name=None))
+    forecast_series = set(out[["country", "disease"]].itertuples(index=False, name=None))
+    if forecast_series != expected:
+        raise AssertionError(f"Forecast series differ from the input: missing {sorted(expected - forecast_series)}, "
+                             f"extra {sorted(forecast_series - expected)}")
+    horizons = out.groupby(["country", "disease"])["year"].nunique()
+    if (horizons != forecast.HORIZON).any():
+        raise AssertionError(f"Series without a full horizon: {horizons[horizons != forecast.HORIZON].to_dict()}")
+    print(f"✅ Global model forecast the {len(expected)} series of a ragged input "
+          f"({df['country'].nunique()} countries, {len(out)} rows)")
+
+if __name__ == "__main__":
+    main()
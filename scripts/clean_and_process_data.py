@@ -5,17 +5,19 @@ import os
 from datetime import datetime
 from datetime import timezone as timz
 
+from download_file_from_s3 import enable_local_cache, read_csv
+
 # S3 config
 bucket = "vacc-disease-mlops-pipeline-argh"
 s3 = boto3.client("s3")
+enable_local_cache()
 
 def list_s3_files(prefix):
     response = s3.list_objects_v2(Bucket=bucket, Prefix=prefix)
     return [obj["Key"] for obj in response.get("Contents", []) if obj["Key"].endswith(".csv")]
 
 def download_csv(key):
-    obj = s3.get_object(Bucket=bucket, Key=key)
-    return pd.read_csv(io.BytesIO(obj["Body"].read()))
+    return read_csv(bucket, key)
 
 def process_category(category):
     prefix = f"raw/{category}/"
@@ -1,14 +1,22 @@
 #Global function to download files from S3.
 #It locates the latest file uploaded and return that one
 #Used to avoid repeated code in all files.
-import boto3
-import re
+#The dataset catalog (lambda_ingest/dataset_catalog.py) answers with one GET;
+#files written before the catalog existed are found with a paginated scan.
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "lambda_ingest"))
+from dataset_catalog import latest_key
+# The scripts read S3 through here, with the cache on once enable_local_cache() ran
+from s3_access import read_csv
+import s3_cache
 
 def download_s3_file(bucket, InputPrefix, FileName):
-    s3 = boto3.client("s3")
-    """Fetch the most recent file from the forecasting input folder."""
-    response = s3.list_objects_v2(Bucket=bucket, Prefix=InputPrefix)
-    pattern = rf"{re.escape(FileName)}(\d{{8}})\.csv$"
-    files = [obj['Key'] for obj in response.get('Contents', []) if re.search(pattern, obj['Key'])]
-    latest = max(files, key=lambda x: re.search(r"(\d{8})", x).group(1))
-    return latest
\ No newline at end of file
+    """Fetch the most recent file from the forecasting input folder ("" if there is none)."""
+    return latest_key(bucket, FileName.rstrip("_"), InputPrefix)
+
+#Function to read S3 through the local cache, so repeat runs read unchanged objects from disk.
+def enable_local_cache():
+    """Directory and size limit come from S3_CACHE_DIR and S3_CACHE_MAX_MB."""
+    return s3_cache.enable()
@@ -7,9 +7,12 @@ import io
 import os
 import json
 
+from download_file_from_s3 import enable_local_cache, read_csv
+
 # S3 config
 BUCKET = "vacc-disease-mlops-pipeline-argh"
 s3 = boto3.client("s3")
+enable_local_cache()
 # Getting timestamp date for files.
 tmstamp = datetime.now(tz=timz.utc).strftime("%Y%m%d")
 
@@ -22,11 +25,9 @@ def load_vacc_disease_data():
     try:
         vacc_key = f"processed/vaccination/processed_vaccination_{tmstamp}.csv"
         disease_key = f"processed/disease/processed_disease_{tmstamp}.csv"
-        vacc_obj = s3.get_object(Bucket=BUCKET, Key=vacc_key)
-        disease_obj = s3.get_object(Bucket=BUCKET, Key=disease_key)
-        vacc_df = pd.read_csv(io.BytesIO(vacc_obj["Body"].read()), low_memory=False)
+        vacc_df = read_csv(BUCKET, vacc_key, low_memory=False)
         print("-> Total vaccination records:", len(vacc_df))
-        disease_df = pd.read_csv(io.BytesIO(disease_obj["Body"].read()), low_memory=False)
+        disease_df = read_csv(BUCKET, disease_key, low_memory=False)
         print("-> Total disease records:", len(disease_df))
         print("✅ Vaccination and disease data loaded successfully.")
     except Exception as e:
@@ -44,8 +45,7 @@ def get_country_name(df):
     
     ctry_key = "country_codes/country_codes.csv"
     #Loading countries from S3
-    count_obj = s3.get_object(Bucket=BUCKET, Key=ctry_key)
-    country_codes = pd.read_csv(io.BytesIO(count_obj["Body"].read()), low_memory=False, sep=",", on_bad_lines='skip')    
+    country_codes = read_csv(BUCKET, ctry_key, low_memory=False, sep=",", on_bad_lines='skip')
     df = df.merge(country_codes, left_on="country", right_on="code_3", how="left", suffixes=("", "_x"))
     df = df.drop(columns=["code_3"], errors="ignore")
     df.rename(columns={"country_x": "country_name"}, inplace=True)
@@ -12,7 +12,10 @@ from datetime import datetime
 from datetime import timezone as timz
 import warnings
 
+from download_file_from_s3 import enable_local_cache, read_csv
+
 s3 = boto3.client("s3")
+enable_local_cache()
 S3_BUCKET = "vacc-disease-mlops-pipeline-argh"
 INPUT_PREFIX = "processed/forecasting/"
 InputFileName = "cleaned_for_forecast_"
@@ -111,8 +114,7 @@ def generate_forecast_models(df):
 #Main method to execute forecast
 def execute_forecast(key):
     """Download a CSV file from S3 into a DataFrame."""
-    response = s3.get_object(Bucket=S3_BUCKET, Key=key)
-    df = pd.read_csv(response['Body'])
+    df = read_csv(S3_BUCKET, key)
     if (df.empty == True):
         return {
         "statusCode": 404,